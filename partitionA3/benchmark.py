@@ -0,0 +1,215 @@
+
+"""Benchmark runner: cut cost, time, memory and throughput of the FM engine on every benchmark file"""
+import os
+import sys
+import csv
+import json
+import glob
+import time
+import getopt
+import Queue
+import resource
+import multiprocessing
+from netlist import Netlist
+from fmEngine import FMEngine
+from multilevel import multilevelPartition
+
+# Fields written to the CSV report, in order
+fields = ['benchmark','cells','nets','pins','cost','passes','moves','loadTime','wallTime','cpuTime','movesPerSec','peakMemMB']
+
+
+def cpuTime():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime+usage.ru_stime
+
+def runBenchmark(inputfile,seed=30,multilevelMode=False,passes=6,minImprove=1,stallMoves=None):
+    """ Load and partition one benchmark file, returns a dictionary with the fields of the report """
+    startTimer = time.time()
+    netlist = Netlist.fromFile(inputfile)
+    loadTime = time.time()-startTimer
+
+    startTimer = time.time()
+    startCpu = cpuTime()
+    if multilevelMode:
+        engine = multilevelPartition(netlist,seed,passes,minImprove=minImprove,stallMoves=stallMoves)
+    else:
+        engine = FMEngine(netlist,seed)
+        engine.splitPlace()
+        engine.initialize()
+        engine.FMPartition(passes,minImprove,stallMoves)
+    wallTime = time.time()-startTimer
+    cpu = cpuTime()-startCpu
+
+    return {'benchmark':os.path.basename(inputfile),
+            'cells':netlist.cells,
+            'nets':netlist.nets,
+            'pins':len(netlist.netCells),
+            'cost':engine.totalCutCost,
+            'passes':engine.passCount,
+            'moves':engine.moveCount,
+            'loadTime':loadTime,
+            'wallTime':wallTime,
+            'cpuTime':cpu,
+            'movesPerSec':engine.moveCount/wallTime if wallTime > 0 else 0.0,
+            # Linux reports the peak resident set size in KB
+            'peakMemMB':resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024.0}
+
+def _runChild(queue,inputfile,seed,multilevelMode,passes,minImprove,stallMoves):
+    try:
+        queue.put(runBenchmark(inputfile,seed,multilevelMode,passes,minImprove,stallMoves))
+    except Exception as error:
+        queue.put({'benchmark':os.path.basename(inputfile),'error':"%s: %s" % (type(error).__name__,error)})
+
+def runIsolated(inputfile,seed=30,multilevelMode=False,passes=6,minImprove=1,stallMoves=None):
+    """ Run one benchmark in its own process so peak memory belongs to that benchmark only.
+        A benchmark that fails or whose process dies returns only its name and the error """
+    queue = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_runChild,args=(queue,inputfile,seed,multilevelMode,passes,minImprove,stallMoves))
+    child.start()
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1)
+        except Queue.Empty:
+            if child.is_alive():
+                continue
+            # The result may arrive just as the process exits
+            try:
+                result = queue.get(timeout=1)
+            except Queue.Empty:
+                result = {'benchmark':os.path.basename(inputfile),'error':"Process exited with code %s" % child.exitcode}
+    child.join()
+    return result
+
+def runRepeated(inputfile,repeats=3,seed=30,multilevelMode=False,passes=6,minImprove=1,stallMoves=None):
+    """ Fastest of repeats isolated runs of one benchmark, so wall times are not those of a slow sample.
+        Returns the first failed run if any """
+    best = None
+    for repeat in range(0,max(repeats,1)):
+        result = runIsolated(inputfile,seed,multilevelMode,passes,minImprove,stallMoves)
+        if 'error' in result:
+            return result
+        if best is None or result['wallTime'] < best['wallTime']:
+            best = result
+    return best
+
+def compare(results,baseline,threshold=0.1,timeThreshold=0.5,timeFloor=0.05):
+    """ Regressions of the results against a baseline report. Cost may grow by threshold and wall time
+        by timeThreshold, as fractions of the baseline. Wall times within timeFloor seconds of the baseline
+        are timer noise and never regress. Returns a list of messages """
+    regressions = []
+    baseDict = dict((r['benchmark'],r) for r in baseline)
+    for result in results:
+        base = baseDict.get(result['benchmark'])
+        if base is None:
+            continue
+        if result['cost'] > base['cost']*(1+threshold):
+            regressions.append("%s: cost %d, baseline %d" % (result['benchmark'],result['cost'],base['cost']))
+        if result['wallTime'] > base['wallTime']*(1+timeThreshold) and result['wallTime']-base['wallTime'] > timeFloor:
+            regressions.append("%s: wall time %.3fs, baseline %.3fs" % (result['benchmark'],result['wallTime'],base['wallTime']))
+    return regressions
+
+def writeJson(results,outputfile):
+    fout = open(outputfile,'w')
+    json.dump(results,fout,indent=1,sort_keys=True)
+    fout.close()
+
+def writeCsv(results,outputfile):
+    fout = open(outputfile,'wb')
+    writer = csv.DictWriter(fout,fields)
+    writer.writeheader()
+    writer.writerows(results)
+    fout.close()
+
+def main(argv):
+    #=================Options=================#
+    # Default Values
+    benchDir = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','benchmarks')
+    jsonfile = 'results.json'
+    csvfile = None
+    baselinefile = None
+    threshold = 0.1
+    timeThreshold = 0.5
+    seed = 30
+    multilevelMode = False
+    passes = 6
+    minImprove = 1
+    stallMoves = None
+    repeats = 3
+
+    try:
+        opts, args = getopt.getopt(argv, "hmd:o:c:b:r:t:s:n:", ["passes=","min-improve=","stall="])
+    except getopt.GetoptError:
+        print 'benchmark.py [-d <benchmarkDir>] [-o <results.json>] [-c <results.csv>] [-b <baseline.json>]'
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            print 'benchmark.py [-d <benchmarkDir>] [-o <results.json>] [-c <results.csv>] [-b <baseline.json>] [-r <ratio>] [-t <ratio>] [-s <Seed>] [-n <Repeats>] [-m] [--passes <Passes>] [--min-improve <Cost>] [--stall <Moves>]'
+            print "-d <benchmarkDir>: Directory of benchmark files"
+            print "-o <results.json>: JSON report"
+            print "-c <results.csv>: CSV report"
+            print "-b <baseline.json>: Fail on regressions against a previous JSON report"
+            print "-r <ratio>: Allowed cost increase over the baseline, default 0.1"
+            print "-t <ratio>: Allowed wall time increase over the baseline, default 0.5, differences under 0.05s are ignored"
+            print "-n <Repeats>: Runs of every benchmark, the fastest is reported, default 3"
+            print "-m : Multilevel Mode"
+            print "--passes <Passes>: Maximum number of FM passes, default 6"
+            print "--min-improve <Cost>: Stop after a pass that improves the cut by less than Cost, default 1"
+            print "--stall <Moves>: End a pass after Moves moves without a new best cut"
+            sys.exit()
+        elif opt == '-d':
+            benchDir = arg
+        elif opt == '-o':
+            jsonfile = arg
+        elif opt == '-c':
+            csvfile = arg
+        elif opt == '-b':
+            baselinefile = arg
+        elif opt == '-r':
+            threshold = float(arg)
+        elif opt == '-t':
+            timeThreshold = float(arg)
+        elif opt == '-s':
+            seed = int(arg)
+        elif opt == '-n':
+            repeats = int(arg)
+        elif opt == '-m':
+            multilevelMode = True
+        elif opt == '--passes':
+            passes = int(arg)
+        elif opt == '--min-improve':
+            minImprove = int(arg)
+        elif opt == '--stall':
+            stallMoves = int(arg)
+
+    results = []
+    failures = []
+    for inputfile in sorted(glob.glob(os.path.join(benchDir,'*.txt'))):
+        result = runRepeated(inputfile,repeats,seed,multilevelMode,passes,minImprove,stallMoves)
+        if 'error' in result:
+            print "%-12s FAILED  %s" % (result['benchmark'],result['error'])
+            failures.append(result)
+            continue
+        print "%-12s cost %5d  wall %8.3fs  cpu %8.3fs  %9.0f moves/s  %7.1f MB" % (result['benchmark'],result['cost'],result['wallTime'],result['cpuTime'],result['movesPerSec'],result['peakMemMB'])
+        results.append(result)
+
+    writeJson(results,jsonfile)
+    if csvfile:
+        writeCsv(results,csvfile)
+
+    if baselinefile:
+        fin = open(baselinefile,'r')
+        baseline = json.load(fin)
+        fin.close()
+        regressions = compare(results,baseline,threshold,timeThreshold)
+        for regression in regressions:
+            print "REGRESSION", regression
+        if regressions:
+            sys.exit(1)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,61 @@
+
+"""Checkpoints of FM Engine runs, saved to a compressed .npz file and resumed in a later process"""
+import os
+import numpy as np
+from fmListeners import FMListener
+
+# Bumped when the checkpoint contents change
+checkpointVersion = 1
+
+
+def saveCheckpoint(engine,outputfile):
+    """ Store the partition, best cut, counters, random state and the Cells locked by an interrupted pass.
+        Written to a temporary file first, so an interrupted save keeps the previous checkpoint """
+    version, state, gauss = engine.random.getstate()
+    locked = engine.pendingLocked if engine.pendingLocked is not None else np.zeros(0,dtype=np.int8)
+    tmpfile = outputfile+'.tmp'
+    fout = open(tmpfile,'wb')
+    np.savez_compressed(fout,
+                        version=np.array(checkpointVersion),
+                        netlist=np.array(engine.netlist.arrayHash()),
+                        part=np.packbits(engine.part.astype(np.uint8)),
+                        locked=np.packbits(locked.astype(np.uint8)),
+                        pendingPass=np.array(engine.pendingLocked is not None),
+                        counters=np.array([engine.totalCutCost,engine.passCount,engine.moveCount,engine.seed,engine.targetDif,engine.pendingCost]),
+                        randomState=np.array(state,dtype=np.int64),
+                        randomVersion=np.array(version),
+                        randomGauss=np.array(np.nan if gauss is None else gauss))
+    fout.close()
+    os.rename(tmpfile,outputfile)
+
+def loadCheckpoint(engine,inputfile):
+    """ Restore a checkpoint into a new FM Engine of the same Netlist and initialize it.
+        Raises ValueError when the checkpoint belongs to another Netlist or version """
+    arrays = np.load(inputfile)
+    try:
+        if int(arrays['version']) != checkpointVersion:
+            raise ValueError("%s: checkpoint version %d, expected %d" % (inputfile,int(arrays['version']),checkpointVersion))
+        # A checkpoint only resumes on the same Netlist
+        if str(arrays['netlist']) != engine.netlist.arrayHash():
+            raise ValueError("%s: checkpoint of a different netlist" % inputfile)
+        cells = engine.cells
+        engine.setPlacement(np.unpackbits(arrays['part'])[:cells])
+        cost, engine.passCount, engine.moveCount, engine.seed, engine.targetDif, engine.pendingCost = arrays['counters'].tolist()
+        gauss = float(arrays['randomGauss'])
+        engine.random.setstate((int(arrays['randomVersion']),tuple(arrays['randomState'].tolist()),None if np.isnan(gauss) else gauss))
+        engine.initialize()
+        if bool(arrays['pendingPass']):
+            engine.pendingLocked = np.unpackbits(arrays['locked'])[:cells].astype(np.int8)
+    finally:
+        arrays.close()
+    if engine.totalCutCost != cost:
+        raise ValueError("%s: restored cut cost %d differs from the saved %d" % (inputfile,engine.totalCutCost,cost))
+
+
+class CheckpointListener(FMListener):
+    """ Save a checkpoint after every pass """
+    def __init__(self,outputfile):
+        self.outputfile = outputfile
+
+    def onPass(self,engine,stats):
+        saveCheckpoint(engine,self.outputfile)
@@ -0,0 +1,118 @@
+
+"""Incremental repartitioning after small netlist edits (ECO), refining a previous partition from the changed Cells"""
+import numpy as np
+from netlist import Netlist
+from fmEngine import FMEngine
+
+
+def readDelta(deltafile):
+    """ Parse a netlist delta file. One edit per line, # starts a comment:
+            addcells <number> [weight]: New Cells numbered after the existing ones
+            removecell <cell>: Cell is disconnected and its weight set to 0, numbering is kept
+            addnet <source> <sink>...: New connections from source to the sinks
+            removenet <source> [<sink>...]: Remove the connections from source to the sinks, or the whole Net of source
+        Returns a dictionary of the lists of edits: addCells (number, weight), removeCells, addNets and removeNets (source, sinks) """
+    delta = {'addCells':[],'removeCells':[],'addNets':[],'removeNets':[]}
+    fin = open(deltafile,'r')
+    for lineNum, line in enumerate(fin):
+        fields = line.split('#')[0].split()
+        if not fields:
+            continue
+        try:
+            edit = fields[0]
+            values = [int(field) for field in fields[1:]]
+            if edit == 'addcells':
+                delta['addCells'].append((values[0],values[1] if len(values) > 1 else 1))
+            elif edit == 'removecell':
+                delta['removeCells'].append(values[0])
+            elif edit == 'addnet' and len(values) > 1:
+                delta['addNets'].append((values[0],values[1:]))
+            elif edit == 'removenet':
+                delta['removeNets'].append((values[0],values[1:]))
+            else:
+                raise ValueError(edit)
+        except (ValueError,IndexError):
+            fin.close()
+            raise ValueError("%s line %d: invalid edit '%s'" % (deltafile,lineNum+1,line.strip()))
+    fin.close()
+    return delta
+
+def applyDelta(netlist,delta):
+    """ Netlist after the edits of the delta and the Cells touched by them:
+        added Cells, Cells of added or removed connections and the neighbours of removed Cells """
+    cells = netlist.cells+sum(number for number, weight in delta['addCells'])
+    weights = np.zeros(cells,dtype=np.int32)
+    weights[:netlist.cells] = netlist.cellWeight
+    touched = range(netlist.cells,cells)
+    newCell = netlist.cells
+    for number, weight in delta['addCells']:
+        weights[newCell:newCell+number] = weight
+        newCell+=number
+
+    srcs, sinks, nets = netlist.connections()
+    keep = np.ones(len(srcs),dtype=bool)
+
+    for source, removed in delta['removeNets']:
+        if min([source]+removed) < 0 or max([source]+removed) >= cells:
+            raise ValueError("Delta removes connections of Cells outside of the %d Cells of the edited netlist" % cells)
+        drop = (srcs==source)
+        if removed:
+            drop&= np.in1d(sinks,removed)
+        keep&= ~drop
+        touched.append(source)
+        touched.extend(sinks[drop].tolist())
+
+    if delta['removeCells']:
+        removeCells = np.array(delta['removeCells'],dtype=np.int32)
+        if removeCells.max() >= cells or removeCells.min() < 0:
+            raise ValueError("Delta removes Cells outside of the %d Cells of the edited netlist" % cells)
+        drop = np.in1d(srcs,removeCells) | np.in1d(sinks,removeCells)
+        keep&= ~drop
+        touched.extend(srcs[drop].tolist())
+        touched.extend(sinks[drop].tolist())
+        weights[removeCells] = 0
+
+    addSrcs = [source for source, added in delta['addNets'] for sink in added]
+    addSinks = [sink for source, added in delta['addNets'] for sink in added]
+    touched.extend(addSrcs)
+    touched.extend(addSinks)
+    srcs = np.concatenate((srcs[keep],np.array(addSrcs,dtype=np.int32)))
+    sinks = np.concatenate((sinks[keep],np.array(addSinks,dtype=np.int32)))
+    if len(srcs) and (srcs.max() >= cells or sinks.max() >= cells or min(srcs.min(),sinks.min()) < 0):
+        raise ValueError("Delta connects Cells outside of the %d Cells of the edited netlist" % cells)
+
+    edited = Netlist.fromPins(cells,srcs,sinks,netlist.rows,netlist.cols,weights)
+    touched = np.unique(np.array(touched,dtype=np.int32))
+    return edited, touched
+
+def extendPartition(part,weights):
+    """ Partition of the edited netlist. Existing Cells keep their partition and each added Cell goes to the lighter one """
+    newPart = np.zeros(len(weights),dtype=np.int8)
+    newPart[:len(part)] = part
+    sizes = np.bincount(newPart[:len(part)],weights=weights[:len(part)],minlength=2).astype(int).tolist()
+    for cell in range(len(part),len(weights)):
+        side = 0 if sizes[0] <= sizes[1] else 1
+        newPart[cell] = side
+        sizes[side]+=int(weights[cell])
+    return newPart
+
+def ecoPartition(netlist,part,delta,seed=30,passes=6,minImprove=1,stallMoves=None,debugMode=False,listeners=None,profile=False):
+    """ Apply a delta to the Netlist and refine its previous partition with FM, seeded from the touched Cells only.
+        Passes end after stallMoves moves without a new best cut, by default twice the touched Cells and at least 100,
+        so moves stay near the edits instead of spreading over the whole netlist.
+        Returns the edited Netlist, the FM Engine holding the new partition and the touched Cells """
+    if len(part) != netlist.cells:
+        raise ValueError("Partition has %d Cells, netlist has %d" % (len(part),netlist.cells))
+    if len(part) and (np.min(part) < 0 or np.max(part) > 1):
+        raise ValueError("Partition has Cells outside of partitions 0 and 1")
+    edited, touched = applyDelta(netlist,delta)
+    engine = FMEngine(edited,seed,debugMode)
+    engine.listeners = list(listeners or [])
+    engine.profile = profile
+    engine.setPlacement(extendPartition(part,edited.cellWeight))
+    engine.initialize(touched)
+    engine.rebalance()
+    if stallMoves is None:
+        stallMoves = max(100,2*len(touched))
+    engine.FMPartition(passes,minImprove,stallMoves)
+    return edited, engine, touched
@@ -0,0 +1,410 @@
+
+"""Fiduccia-Mattheyses partitioning engine on the array backed Netlist"""
+import time
+import random
+import numpy as np
+from gainBucket import GainBucket
+
+
+class FMEngine():
+    """ Two way Fiduccia-Mattheyses partitioning running directly on the Netlist arrays
+        part: int8 array with the partition of every Cell, 0 is A and 1 is B
+        locked: int8 array marking the Cells already moved on the current pass
+        gains: Gain of every Cell, moving force minus retention force
+        netSides: Number of Cells of every Net on each partition
+        active: None when every Cell can move, otherwise int8 array of the Cells considered for moves
+        candidates: Active Cells, the Cells that joined since they were last listed are in joined
+        sizes: Total Cell weight on each partition, kept within the balance tolerance
+     """
+    def __init__(self,netlist,seed=30,debugMode=False):
+
+        self.netlist = netlist
+        self.cells = netlist.cells
+        # Cells connected to every Cell, used for gains
+        self.starPtr, self.starCells = netlist.starAdjacency()
+        self.degree = np.diff(self.starPtr).astype(np.int32)
+
+        self.part = np.zeros(self.cells,dtype=np.int8)
+        self.locked = np.zeros(self.cells,dtype=np.int8)
+        self.gains = np.zeros(self.cells,dtype=np.int32)
+        self.netSides = np.zeros((netlist.nets,2),dtype=np.int32)
+        self.active = None
+        self.candidates = None
+        self.joined = []
+        # Boundary Mode starts every pass from the Cells connected to the other partition
+        self.boundaryMode = False
+        # Inactive Cells left behind by a move join the candidates, off when only the active Cells may move
+        self.joining = True
+        # Weight of every Cell and of each partition. Moves keep the difference
+        # within twice the largest Cell weight, 2 for unit weights
+        self.weights = netlist.cellWeight
+        self.sizes = [0,0]
+        self.tolerance = 2*int(self.weights.max()) if self.cells else 2
+        # Desired weight of A minus weight of B, non zero for uneven splits
+        self.targetDif = 0
+        # One gain bucket structure per partition holding the unlocked Cells
+        self.buckets = [None,None]
+        self.totalCutCost = 0
+        # Number of FM passes and moves run, rollbacks not included
+        self.passCount = 0
+        self.moveCount = 0
+
+        # Seeded generator for initial placement and tie breaking
+        self.seed = seed
+        self.random = random.Random(seed)
+        # Debug Mode checks the incremental cut cost against a full recomputation after every move
+        self.debug = debugMode
+        # Listeners of move and pass events, see fmListeners.FMListener
+        self.listeners = []
+        # Profile Mode times gain updates, cut cost evaluation and move selection
+        self.profile = False
+        self.gainTime = 0.0
+        self.cutTime = 0.0
+        self.selectTime = 0.0
+        # Counters of every pass run, in order
+        self.passStats = []
+        # Wall clock time (time.time) after which passes stop at the best cut so far, None runs without limit
+        self.deadline = None
+        self.timedOut = False
+        # Set from another thread to stop like at the deadline, without setting timedOut
+        self.stopped = False
+        # Cells locked by a pass interrupted at the deadline and its initial cut cost. The next FMPartition call continues that pass
+        self.pendingLocked = None
+        self.pendingCost = 0
+
+    def splitPlace(self):
+        """ Split placement, Cells with the most connections fill partition A first """
+        order = np.argsort(-self.netlist.starDegree(),kind='mergesort')
+        self.halfPlace(order)
+
+    def randPlace(self):
+        """ Random placement, a seeded shuffle of the Cells is split in half """
+        order = range(0,self.cells)
+        self.random.shuffle(order)
+        self.halfPlace(np.array(order,dtype=np.int32))
+
+    def halfPlace(self,order):
+        """ Cells in order fill partition A up to half of the total weight plus the target difference, the rest go to B """
+        filled = np.cumsum(self.weights[order])
+        half = (int(filled[-1])+self.targetDif)//2 if self.cells else 0
+        self.part[order] = (filled>half)
+        self.countSizes()
+
+    def setPlacement(self,part):
+        """ Placement from a given partition of every Cell """
+        self.part[:] = part
+        self.countSizes()
+
+    def countSizes(self):
+        self.sizes = np.bincount(self.part,weights=self.weights,minlength=2).astype(int).tolist()
+
+    def initialize(self,activeCells=None):
+        """ Gains, side counts and cut cost of the initial placement.
+            With activeCells only those Cells are considered for moves at first. Cells left on the partition of a moved
+            Cell and connected to it join them. Gains of all Cells are kept up to date either way """
+        self.locked[:] = 0
+        self.gain()
+        self.joined = []
+        if activeCells is None:
+            self.active = None
+            self.candidates = None
+        else:
+            self.active = np.zeros(self.cells,dtype=np.int8)
+            self.candidates = np.unique(activeCells).astype(np.int32)
+            self.active[self.candidates] = 1
+            self.buckets = [None,None]
+        self.initNetSides()
+        self.cutCost()
+
+    def FMPartition(self,passes=6,minImprove=1,stallMoves=None):
+        """ Run FM passes. Every pass moves all Cells once, logging the moves,
+            then rolls back to the best prefix of the move sequence.
+            passes: Maximum number of passes
+            minImprove: Stop after a pass that improves the cut cost by less than this, 0 runs all passes
+            stallMoves: End a pass after this many moves without a new best cut, None moves all Cells
+            Near the deadline the current pass rolls back to its best cut and passes stop, timedOut is set. The pass stops
+            early enough for the rollback, which takes about as long as the moves it undoes, to end by the deadline.
+            Setting stopped does the same. Either way the next call continues the interrupted pass.
+            Boundary Mode fills the gain buckets with the Cells connected across the cut only. Other Cells have negative gains
+            and join when a neighbour leaves their partition. Passes end after max(100, 1% of the Cells) moves without a new
+            best cut unless stallMoves is given """
+
+        bestCutCost = self.totalCutCost
+        profile = self.profile
+        deadline = self.deadline
+        self.timedOut = False
+        # Without a cutoff, Cells joining the boundary would sweep the pass across the whole Netlist
+        if self.boundaryMode and stallMoves is None:
+            stallMoves = max(100,self.cells//100)
+
+        for loop in range(0,passes):
+            if self.stopped:
+                break
+            if deadline is not None and time.time() > deadline:
+                self.timedOut = True
+                break
+            passTimer = time.time()
+            self.gainTime = self.cutTime = self.selectTime = 0.0
+            # Cells locked before the first move of the pass
+            passLocked = self.pendingLocked
+            self.pendingLocked = None
+            if passLocked is not None:
+                self.locked[:] = passLocked
+            else:
+                self.locked[:] = 0
+            if self.boundaryMode:
+                self.boundaryCandidates()
+            self.fillBuckets()
+            # Cells moved on this pass and number of moves leading to the best cut
+            moveLog = []
+            bestMoves = 0
+            passCutCost = bestCutCost if passLocked is None else self.pendingCost
+            interrupted = False
+
+            while True:
+
+                # No new best cut for stallMoves moves, the rest of the pass is unlikely to improve
+                if stallMoves is not None and len(moveLog)-bestMoves >= stallMoves:
+                    break
+
+                if self.stopped:
+                    interrupted = True
+                    break
+
+                # Clock is only read every 64 moves. Undoing the moves past the best cut takes about as long as making them
+                if deadline is not None and not (len(moveLog)&63):
+                    now = time.time()
+                    moveTime = (now-passTimer)/len(moveLog) if moveLog else 0.0
+                    if now+(len(moveLog)-bestMoves+64)*moveTime > deadline:
+                        self.timedOut = interrupted = True
+                        break
+
+                # Highest gain unlocked Cell whose move will not unbalance partitions
+                if profile:
+                    timer = time.time()
+                    moveNode = self.selectMove()
+                    self.selectTime+= time.time()-timer
+                else:
+                    moveNode = self.selectMove()
+                if moveNode == -1:
+                    break
+
+                self.move(moveNode)
+                moveLog.append(moveNode)
+                self.moveCount+=1
+                if self.listeners:
+                    for listener in self.listeners:
+                        listener.onMove(self,self.totalCutCost,bestCutCost)
+
+                # Store best result
+                if (self.totalCutCost<=bestCutCost):
+                    if (self.totalCutCost==bestCutCost):
+                        if (self.random.random() < 0.8):
+                            continue
+
+                    bestMoves = len(moveLog)
+                    bestCutCost=self.totalCutCost
+
+            self.rollback(moveLog,bestMoves)
+            if interrupted:
+                # Cells moved up to the best cut stay locked for the rest of the pass
+                self.pendingLocked = np.zeros(self.cells,dtype=np.int8) if passLocked is None else passLocked.copy()
+                self.pendingLocked[moveLog[:bestMoves]] = 1
+                self.pendingCost = passCutCost
+                break
+            self.passCount+=1
+
+            stats = {'pass':self.passCount,
+                     'cells':self.cells,
+                     'moves':len(moveLog),
+                     'rollbacks':len(moveLog)-bestMoves,
+                     'bestCost':bestCutCost,
+                     'passTime':time.time()-passTimer}
+            if profile:
+                stats['gainTime'] = self.gainTime
+                stats['cutTime'] = self.cutTime
+                stats['selectTime'] = self.selectTime
+            self.passStats.append(stats)
+            for listener in self.listeners:
+                listener.onPass(self,stats)
+
+            if passCutCost-bestCutCost < minImprove:
+                break
+
+        if self.timedOut:
+            for listener in self.listeners:
+                listener.onTimeOut(self)
+        self.locked[:] = 0
+        return bestCutCost
+
+    def rollback(self,moveLog,bestMoves):
+        """ Undo the moves after the best prefix of the log, last move first """
+        for cell in reversed(moveLog[bestMoves:]):
+            self.move(cell)
+
+    def fillBuckets(self):
+        """ Place every unlocked candidate Cell in the gain bucket of its partition, in Cell order.
+            The buckets are allocated once and emptied for every fill """
+        if self.buckets[0] is None:
+            maxGain = 3*int(self.degree.max()) if self.cells else 0
+            self.buckets = [GainBucket(self.cells,maxGain),GainBucket(self.cells,maxGain)]
+        else:
+            self.buckets[0].clear()
+            self.buckets[1].clear()
+        if self.active is None:
+            free = np.flatnonzero(self.locked==0)
+        else:
+            free = np.sort(self.candidateCells())
+            free = free[self.locked[free]==0]
+        for cell, part, gain in zip(free.tolist(),self.part[free].tolist(),self.gains[free].tolist()):
+            self.buckets[part].insert(cell,gain)
+
+    def candidateCells(self):
+        """ Active Cells, including the ones that joined since the last call """
+        if self.joined:
+            self.candidates = np.concatenate((self.candidates,np.array(self.joined,dtype=np.int32)))
+            self.joined = []
+        return self.candidates
+
+    def boundaryCandidates(self):
+        """ Make the Cells with a connection to the other partition the only candidates. The first call finds them
+            from the gains of all Cells, later calls keep the candidates that are still connected across the cut.
+            A Cell that gets connected across the cut has joined the candidates when its neighbour moved """
+        # A Cell is connected to the other partition when its gain is above -degree, see gain
+        if self.active is None:
+            self.active = (self.gains > -self.degree).astype(np.int8)
+            self.candidates = np.flatnonzero(self.active).astype(np.int32)
+            self.joined = []
+            return
+        candidates = self.candidateCells()
+        cross = self.gains[candidates] > -self.degree[candidates]
+        self.active[candidates[~cross]] = 0
+        self.candidates = candidates[cross]
+
+    def activate(self,cell):
+        """ Make an inactive Cell a candidate for moves """
+        self.active[cell] = 1
+        self.joined.append(cell)
+        if self.buckets[0] is not None and not self.locked[cell]:
+            self.buckets[int(self.part[cell])].insert(cell,int(self.gains[cell]))
+
+    def selectMove(self):
+        """ Pick the highest gain Cell among the partitions it can be moved from """
+        moveNode = -1
+        moveGain = None
+        for part in (0,1):
+            bucket = self.buckets[part]
+            if not bucket.isEmpty() and self.balanced(part,bucket.top()):
+                if moveGain is None or bucket.topGain() > moveGain:
+                    moveNode = bucket.top()
+                    moveGain = bucket.topGain()
+        return moveNode
+
+    def balanced(self,part,cell):
+        """ Moving Cell out of part keeps the partition difference within the tolerance, or at least does not increase it.
+            For unit weights this is a difference between 2 and 0 before the move """
+        difParts = self.difParts(part)
+        newDifParts = difParts-2*int(self.weights[cell])
+        return abs(newDifParts) <= max(self.tolerance,abs(difParts))
+
+    def difParts(self,part):
+        """ Weight difference of part over the other partition, relative to the target difference """
+        if part == 0:
+            return self.sizes[0]-self.sizes[1]-self.targetDif
+        return self.sizes[1]-self.sizes[0]+self.targetDif
+
+    def rebalance(self):
+        """ Move the highest gain Cells out of the heavier partition until the difference is within the tolerance """
+        self.fillBuckets()
+        while abs(self.difParts(0)) > self.tolerance:
+            heavyPart = 0 if self.difParts(0)>0 else 1
+            bucket = self.buckets[heavyPart]
+            cell = bucket.top()
+            if cell == -1 or not self.balanced(heavyPart,cell):
+                break
+            self.move(cell)
+        self.locked[:] = 0
+
+    def move(self,cell):
+        """ Lock Cell and move it to the other partition updating gains and cut cost """
+        movePart = int(self.part[cell])
+        tgtPart = 1-movePart
+        if self.buckets[movePart].contains(cell):
+            self.buckets[movePart].remove(cell)
+        self.locked[cell] = 1
+        self.part[cell] = tgtPart
+        weight = int(self.weights[cell])
+        self.sizes[movePart]-=weight
+        self.sizes[tgtPart]+=weight
+        if self.profile:
+            timer = time.time()
+            self.incrGain(cell)
+            self.gainTime+= time.time()-timer
+            timer = time.time()
+            self.cutIncrCost(cell,movePart,tgtPart)
+            self.cutTime+= time.time()-timer
+        else:
+            self.incrGain(cell)
+            self.cutIncrCost(cell,movePart,tgtPart)
+        if self.debug and not np.array_equal(self.gains,4*self.crossCounts()-self.degree):
+            raise RuntimeError("Incremental gains differ from full gains after moving Cell %d" % cell)
+
+    def gain(self):
+        """ Find the gain of every Cell by finding the difference between the number of Cells connected to that Cell on the same partition (retention force)
+        and the number of Cells connected that are on the other partition (moving force). All Cells at once over the star connections"""
+        # 3 per connection to the other partition minus 1 per connection on the same partition
+        self.gains[:] = 4*self.crossCounts()-self.degree
+
+    def crossCounts(self):
+        """ Number of connections of every Cell to the other partition """
+        owner = np.repeat(np.arange(self.cells,dtype=np.int32),np.diff(self.starPtr))
+        return np.bincount(owner,weights=(self.part[self.starCells]!=self.part[owner]),minlength=self.cells).astype(np.int32)
+
+    def incrGain(self,movedNode):
+        """ Update gains of the Cells connected to the moved Cell. Every connection to a Cell
+        that stays on the source partition gains 4 and every connection to a Cell on the target partition loses 4.
+        The connections of the moved Cell swap sides, so its gain 4*cross-degree becomes 2*degree minus that gain """
+        self.gains[movedNode] = 2*self.degree[movedNode]-self.gains[movedNode]
+
+        connCells = self.starCells[self.starPtr[movedNode]:self.starPtr[movedNode+1]]
+        connParts = self.part[connCells]
+        np.add.at(self.gains,connCells,np.where(connParts==self.part[movedNode],-4,4))
+
+        # Inactive neighbours left behind on the source partition now connect across the cut and join the candidates.
+        # They are never in a bucket, nor are locked Cells
+        joining = self.active is not None and self.joining
+        srcPart = 1-int(self.part[movedNode])
+        for connCell, connPart, connGain in zip(connCells.tolist(),connParts.tolist(),self.gains[connCells].tolist()):
+            bucket = self.buckets[connPart]
+            if bucket.contains(connCell):
+                bucket.update(connCell,connGain)
+            elif joining and connPart == srcPart and not self.active[connCell]:
+                self.activate(connCell)
+
+    def cutCost(self):
+        """ Full cut cost, number of Nets with Cells on both partitions """
+        sidesB = np.bincount(self.netlist.pinNets,weights=self.part[self.netlist.netCells],minlength=self.netlist.nets)
+        sidesA = np.diff(self.netlist.netPtr)-sidesB
+        self.totalCutCost = int(np.count_nonzero((sidesA>0)&(sidesB>0)))
+        return self.totalCutCost
+
+    def initNetSides(self):
+        """ Count the Cells of every Net on each partition """
+        self.netSides[:] = 0
+        np.add.at(self.netSides,(self.netlist.pinNets,self.part[self.netlist.netCells]),1)
+
+    def cutIncrCost(self,movedNode,movedPart,tgtPart):
+        """ Update cut cost with the Nets of the moved Cell only. A Net is cut while it has Cells on both partitions """
+        nets = self.netlist.cellNets[self.netlist.cellPtr[movedNode]:self.netlist.cellPtr[movedNode+1]]
+        sides = self.netSides[nets]
+        wasCut = np.count_nonzero((sides[:,0]>0)&(sides[:,1]>0))
+        sides[:,movedPart]-=1
+        sides[:,tgtPart]+=1
+        self.netSides[nets] = sides
+        isCut = np.count_nonzero((sides[:,0]>0)&(sides[:,1]>0))
+        self.totalCutCost+= isCut-wasCut
+
+        if self.debug:
+            incrCutCost = self.totalCutCost
+            if self.cutCost() != incrCutCost:
+                raise RuntimeError("Incremental cut cost %d differs from full cut cost %d after moving Cell %d" % (incrCutCost,self.totalCutCost,movedNode))
@@ -0,0 +1,49 @@
+
+"""Listeners of FM Engine events: cost of every move and counters of every pass"""
+import json
+
+
+class FMListener():
+    """ Base listener, subclasses override the events they need.
+        onMove: Called after every move with the current and best cut cost
+        onPass: Called after every pass with its counters: pass, cells, moves, rollbacks, bestCost, passTime
+                and in Profile Mode gainTime, cutTime and selectTime in seconds
+        onTimeOut: Called when passes stop at the deadline
+     """
+    def onMove(self,engine,cost,bestCost):
+        pass
+
+    def onPass(self,engine,stats):
+        pass
+
+    def onTimeOut(self,engine):
+        pass
+
+
+class TimeLimitListener(FMListener):
+    """ Record whether a run stopped at its deadline """
+    def __init__(self):
+        self.timedOut = False
+
+    def onTimeOut(self,engine):
+        self.timedOut = True
+
+
+class JsonLinesLogger(FMListener):
+    """ Write one JSON object per line to a file for every pass, and for every move when moves is True.
+        Objects carry an event field, 'pass' or 'move' """
+    def __init__(self,outputfile,moves=False):
+        self.fout = open(outputfile,'w')
+        self.moves = moves
+
+    def onMove(self,engine,cost,bestCost):
+        if self.moves:
+            self.fout.write(json.dumps({'event':'move','cells':engine.cells,'cost':cost,'bestCost':bestCost})+'\n')
+
+    def onPass(self,engine,stats):
+        record = {'event':'pass'}
+        record.update(stats)
+        self.fout.write(json.dumps(record,sort_keys=True)+'\n')
+
+    def close(self):
+        self.fout.close()
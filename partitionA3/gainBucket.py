@@ -0,0 +1,84 @@
+
+"""Based on the Fiduccia-Mattheyses bucket list"""
+class GainBucket():
+    """ Gain bucket structure for the unlocked Cells of one partition side
+        Bucket: Doubly linked list of Cells that share the same gain
+        Max Gain Pointer: Index of the highest non-empty bucket
+        Insert, remove and update are O(1). Finding the best Cell is O(1) amortized.
+     """
+    def __init__(self,cells,maxGain):
+
+        # Gains go from -maxGain to maxGain, bucket index is gain+maxGain
+        self.maxGain = maxGain
+        # Array of buckets, each entry is the head Cell of the list or -1 when empty
+        self.heads = [-1]*(2*maxGain+1)
+        # Doubly linked Cell lists, -1 terminates the list
+        self.next = [-1]*cells
+        self.prev = [-1]*cells
+        # Gain of every Cell in the structure, None if the Cell is not in a bucket
+        self.gains = [None]*cells
+        # Index of the highest non-empty bucket, -1 when empty
+        self.maxIndex = -1
+        self.size = 0
+
+    def insert(self,cell,gain):
+        """ Push Cell at the head of the bucket for its gain """
+        index = gain+self.maxGain
+        head = self.heads[index]
+        self.next[cell] = head
+        self.prev[cell] = -1
+        if head != -1:
+            self.prev[head] = cell
+        self.heads[index] = cell
+        self.gains[cell] = gain
+        if index > self.maxIndex:
+            self.maxIndex = index
+        self.size+=1
+
+    def remove(self,cell):
+        """ Unlink Cell from its bucket and move the max gain pointer down if its bucket is now empty """
+        index = self.gains[cell]+self.maxGain
+        nextCell = self.next[cell]
+        prevCell = self.prev[cell]
+        if prevCell != -1:
+            self.next[prevCell] = nextCell
+        else:
+            self.heads[index] = nextCell
+        if nextCell != -1:
+            self.prev[nextCell] = prevCell
+        self.gains[cell] = None
+        self.size-=1
+        while self.maxIndex >= 0 and self.heads[self.maxIndex] == -1:
+            self.maxIndex-=1
+
+    def update(self,cell,gain):
+        """ Move Cell to the bucket of its new gain """
+        if self.gains[cell] != gain:
+            self.remove(cell)
+            self.insert(cell,gain)
+
+    def clear(self):
+        """ Empty the structure, only the Cells still in it are reset """
+        for head in self.heads:
+            cell = head
+            while cell != -1:
+                self.gains[cell] = None
+                cell = self.next[cell]
+        self.heads = [-1]*len(self.heads)
+        self.maxIndex = -1
+        self.size = 0
+
+    def contains(self,cell):
+        return (self.gains[cell] is not None)
+
+    def top(self):
+        """ Cell with the highest gain, -1 if the structure is empty """
+        if self.maxIndex < 0:
+            return -1
+        return self.heads[self.maxIndex]
+
+    def topGain(self):
+        return self.maxIndex-self.maxGain
+
+    def isEmpty(self):
+        return (self.size == 0)
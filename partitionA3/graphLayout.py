@@ -0,0 +1,91 @@
+
+"""Layout of the GUI Graph view: Cells clustered down to a drawable number of nodes, placed by a
+force directed layout and cached on disk by Netlist"""
+import os
+import json
+import hashlib
+import numpy as np
+from netlist import Netlist
+from multilevel import coarsenLevels
+from resultCache import ResultCache
+
+# Default cache directory, one .npz file per layout
+layoutDir = os.path.join(os.path.expanduser('~'),'.partitionA3','layouts')
+# Bumped when layouts of the same parameters change
+layoutVersion = 1
+
+
+def clusterCells(netlist,maxNodes,seed=30):
+    """ Coarsen the Netlist until at most maxNodes clusters remain, as in Multilevel Mode.
+        Returns the clustered Netlist and the cluster of every Cell """
+    rand = np.random.RandomState(seed)
+    # Clusters need not be balanced, up to 4 times the average size
+    maxWeight = max(2,4*int(netlist.cellWeight.sum())//maxNodes)
+    levels, coarsest = coarsenLevels(netlist,rand,maxWeight,maxNodes)
+    clusterOf = np.arange(netlist.cells,dtype=np.int32)
+    for fine, coarseOf in levels:
+        clusterOf = coarseOf[clusterOf]
+    return coarsest, clusterOf
+
+def sampleNodes(netlist,clusterOf,maxNodes):
+    """ Keep the maxNodes heaviest Cells of the Netlist and the connections between them.
+        Returns the sampled Netlist and the cluster of every original Cell, -1 when left out """
+    keep = np.sort(np.argsort(-netlist.cellWeight,kind='mergesort')[:maxNodes])
+    newIndex = -np.ones(netlist.cells,dtype=np.int32)
+    newIndex[keep] = np.arange(len(keep),dtype=np.int32)
+    srcs, sinks, nets = netlist.connections()
+    both = (newIndex[srcs] >= 0) & (newIndex[sinks] >= 0)
+    sample = Netlist.fromPins(len(keep),newIndex[srcs[both]],newIndex[sinks[both]],cellWeight=netlist.cellWeight[keep])
+    return sample, newIndex[clusterOf]
+
+def forceLayout(netlist,seed=30,iterations=50):
+    """ Fruchterman-Reingold positions of the Cells in the unit square. Connected Cells attract and all Cells
+        repel each other, every iteration moves the Cells at once with a decreasing step. Cells are kept inside
+        the square, so unconnected Cells do not drift away from the rest """
+    cells = netlist.cells
+    rand = np.random.RandomState(seed)
+    pos = rand.random_sample((cells,2))
+    if cells < 2:
+        return pos
+    srcs, sinks, nets = netlist.connections()
+    adjacency = np.zeros((cells,cells))
+    adjacency[srcs,sinks] = 1
+    adjacency[sinks,srcs] = 1
+    # Optimal distance between Cells and step size
+    k = np.sqrt(1.0/cells)
+    step = 0.1
+    cooling = step/(iterations+1)
+    for iteration in range(0,iterations):
+        delta = pos[:,None,:]-pos[None,:,:]
+        distance = np.maximum(np.sqrt((delta**2).sum(axis=2)),0.01)
+        force = k*k/distance**2-adjacency*distance/k
+        displacement = (delta*force[:,:,None]).sum(axis=1)
+        length = np.maximum(np.sqrt((displacement**2).sum(axis=1)),0.01)
+        pos+= displacement*(step/length)[:,None]
+        np.clip(pos,0.0,1.0,out=pos)
+        step-= cooling
+    return pos
+
+def computeLayout(netlist,maxNodes=500,seed=30):
+    """ Graph nodes of the Netlist, clusters of Cells above maxNodes Cells, sampled down to maxNodes if clustering stalls.
+        Returns node positions, node weights in Cells, node pairs of the edges and the node of every Cell (-1 when not shown) """
+    graph, clusterOf = clusterCells(netlist,maxNodes,seed)
+    if graph.cells > maxNodes:
+        graph, clusterOf = sampleNodes(graph,clusterOf,maxNodes)
+    pos = forceLayout(graph,seed)
+    srcs, sinks, nets = graph.connections()
+    return pos, graph.cellWeight.copy(), np.column_stack((srcs,sinks)), clusterOf
+
+def layoutKey(netlist,maxNodes,seed):
+    text = json.dumps({'netlist':netlist.arrayHash(),'maxNodes':maxNodes,'seed':seed,'version':layoutVersion},sort_keys=True)
+    return hashlib.sha1(text).hexdigest()
+
+def cachedLayout(netlist,maxNodes=500,seed=30,directory=None):
+    """ Layout of computeLayout, read from a result cache in the layout directory or computed and stored there """
+    cache = ResultCache(directory or layoutDir,maxEntries=64)
+    key = layoutKey(netlist,maxNodes,seed)
+    layout = cache.getArrays(key,('pos','weights','edges','clusterOf'))
+    if layout is None:
+        layout = computeLayout(netlist,maxNodes,seed)
+        cache.putArrays(key,pos=layout[0],weights=layout[1],edges=layout[2],clusterOf=layout[3])
+    return layout
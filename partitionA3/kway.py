@@ -0,0 +1,156 @@
+
+"""k-way partitioning by recursive bisection with the FM engine and direct k-way refinement"""
+import random
+import multiprocessing
+import numpy as np
+from netlist import Netlist
+from fmEngine import FMEngine
+from multilevel import multilevelPartition
+
+
+def subNetlist(netlist,cells):
+    """ Netlist induced by the given Cells, renumbered in their order. Nets keep their Cells inside the set,
+        the first remaining Cell of a Net becomes its source when the source is outside """
+    local = -np.ones(netlist.cells,dtype=np.int32)
+    local[cells] = np.arange(len(cells),dtype=np.int32)
+    pinLocal = local[netlist.netCells]
+    kept = (pinLocal>=0)
+    keptNets = netlist.pinNets[kept]
+    keptCells = pinLocal[kept]
+    nets, first = np.unique(keptNets,return_index=True)
+    netSrc = np.zeros(netlist.nets,dtype=np.int32)
+    netSrc[nets] = keptCells[first]
+    return Netlist.fromPins(len(cells),netSrc[keptNets],keptCells,cellWeight=netlist.cellWeight[cells])
+
+def netPartCounts(netlist,part,parts):
+    """ Number of Cells of every Net on each partition """
+    counts = np.zeros((netlist.nets,parts),dtype=np.int32)
+    np.add.at(counts,(netlist.pinNets,part[netlist.netCells]),1)
+    return counts
+
+def kwayCutCost(netlist,part,parts):
+    """ Number of Nets spanning more than one partition """
+    counts = netPartCounts(netlist,part,parts)
+    return int(np.count_nonzero((counts>0).sum(axis=1)>1))
+
+def _bisectTask(task,listeners=None,profile=False):
+    """ Bisect a Netlist for parts0 and parts1 partitions, the split follows the ratio of the partition counts """
+    netlist, parts0, parts1, seed, multilevelMode, passes, minImprove, stallMoves = task
+    targetDif = int(netlist.cellWeight.sum())*(parts0-parts1)//(parts0+parts1)
+    if multilevelMode:
+        engine = multilevelPartition(netlist,seed,passes,targetDif=targetDif,minImprove=minImprove,stallMoves=stallMoves,listeners=listeners,profile=profile)
+    else:
+        engine = FMEngine(netlist,seed)
+        engine.listeners = list(listeners or [])
+        engine.profile = profile
+        engine.targetDif = targetDif
+        engine.splitPlace()
+        engine.initialize()
+        engine.FMPartition(passes,minImprove,stallMoves)
+    return engine.part
+
+def recursiveBisection(netlist,parts,seed=30,multilevelMode=False,passes=6,processes=1,minImprove=1,stallMoves=None,listeners=None,profile=False):
+    """ Bisect the Netlist and then every side until there are the given number of partitions.
+        Independent bisections of the same level run on a pool of processes, None is one per CPU.
+        listeners and profile are set on the FM Engine of every bisection, which then run in this process one after the other.
+        Returns the partition of every Cell, from 0 to parts-1 """
+    part = np.zeros(netlist.cells,dtype=np.int32)
+    # Cells, first partition number and number of partitions still to split
+    tasks = [(np.arange(netlist.cells,dtype=np.int32),0,parts)]
+
+    pool = None
+    if processes != 1 and not listeners:
+        pool = multiprocessing.Pool(processes)
+    try:
+        while tasks:
+            jobs = []
+            for cells, first, taskParts in tasks:
+                parts0 = taskParts//2
+                jobs.append((subNetlist(netlist,cells),parts0,taskParts-parts0,seed+first,multilevelMode,passes,minImprove,stallMoves))
+            if pool is not None:
+                sides = pool.map(_bisectTask,jobs,chunksize=1)
+            else:
+                sides = [_bisectTask(job,listeners,profile) for job in jobs]
+
+            nextTasks = []
+            for (cells, first, taskParts), side in zip(tasks,sides):
+                parts0 = taskParts//2
+                cellsA = cells[side==0]
+                cellsB = cells[side==1]
+                part[cellsA] = first
+                part[cellsB] = first+parts0
+                if parts0 > 1:
+                    nextTasks.append((cellsA,first,parts0))
+                if taskParts-parts0 > 1:
+                    nextTasks.append((cellsB,first+parts0,taskParts-parts0))
+            tasks = nextTasks
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return part
+
+def kwayRefine(netlist,part,parts,passes=6,seed=30):
+    """ Direct k-way refinement. Every pass visits the Cells on cut Nets in random order and moves each one
+        to the partition with the highest cut gain, if positive, or to a lighter partition for a zero gain.
+        Partitions stay within the average weight plus the largest Cell weight.
+        Returns the refined partition and its cut cost """
+    rand = random.Random(seed)
+    part = part.copy()
+    counts = netPartCounts(netlist,part,parts)
+    weights = netlist.cellWeight
+    sizes = np.bincount(part,weights=weights,minlength=parts).astype(int).tolist()
+    maxSize = -(-int(weights.sum())//parts)+int(weights.max())
+    cost = int(np.count_nonzero((counts>0).sum(axis=1)>1))
+
+    for loop in range(0,passes):
+        cutNets = ((counts>0).sum(axis=1)>1)
+        boundary = np.unique(netlist.netCells[cutNets[netlist.pinNets]]).tolist()
+        rand.shuffle(boundary)
+        moves = 0
+
+        for cell in boundary:
+            nets = netlist.cellNets[netlist.cellPtr[cell]:netlist.cellPtr[cell+1]]
+            movePart = int(part[cell])
+            weight = int(weights[cell])
+            netCounts = counts[nets]
+            # Partitions spanned by every Net after moving the Cell to each partition
+            spanned = (netCounts>0).sum(axis=1)
+            spannedAfter = spanned[:,None]-(netCounts[:,movePart]==1)[:,None]+(netCounts==0)
+            gains = np.count_nonzero(spanned>1)-(spannedAfter>1).sum(axis=0)
+
+            bestPart = -1
+            bestGain = 0
+            for tgtPart in np.argsort(-gains,kind='mergesort').tolist():
+                if tgtPart == movePart or sizes[tgtPart]+weight > maxSize:
+                    continue
+                gain = int(gains[tgtPart])
+                if gain > 0 or (gain == 0 and sizes[tgtPart]+weight < sizes[movePart]):
+                    bestPart = tgtPart
+                    bestGain = gain
+                break
+
+            if bestPart == -1:
+                continue
+            counts[nets,movePart]-=1
+            counts[nets,bestPart]+=1
+            part[cell] = bestPart
+            sizes[movePart]-=weight
+            sizes[bestPart]+=weight
+            cost-=bestGain
+            moves+=1
+
+        if moves == 0:
+            break
+
+    return part, cost
+
+def kwayPartition(netlist,parts,seed=30,multilevelMode=False,refine=False,passes=6,processes=1,minImprove=1,stallMoves=None,listeners=None,profile=False):
+    """ k-way partition by recursive bisection, optionally followed by direct k-way refinement.
+        listeners and profile are set on the FM Engines of the bisections, see recursiveBisection.
+        Returns the partition of every Cell and the cut cost """
+    part = recursiveBisection(netlist,parts,seed,multilevelMode,passes,processes,minImprove,stallMoves,listeners,profile)
+    if refine:
+        return kwayRefine(netlist,part,parts,passes,seed)
+    return part, kwayCutCost(netlist,part,parts)
@@ -0,0 +1,58 @@
+
+"""Multi-start partitioning, independent runs on a process pool keeping the best cut"""
+import multiprocessing
+import numpy as np
+from netlist import Netlist
+from fmEngine import FMEngine
+from multilevel import multilevelPartition
+
+# Netlist loaded once by every worker process
+_netlist = None
+
+
+def _initWorker(netlist):
+    global _netlist
+    if not isinstance(netlist,Netlist):
+        netlist = Netlist.fromFile(netlist)
+    _netlist = netlist
+
+def partitionStart(start):
+    """ One independent run. Start is (seed, placement, multilevelMode, passes, minImprove, stallMoves) with placement 'split' or 'rand'.
+        Returns the seed, placement, cut cost and partition of every Cell """
+    seed, placement, multilevelMode, passes, minImprove, stallMoves = start
+    if multilevelMode:
+        engine = multilevelPartition(_netlist,seed,passes,placement=placement,minImprove=minImprove,stallMoves=stallMoves)
+    else:
+        engine = FMEngine(_netlist,seed)
+        if placement == 'rand':
+            engine.randPlace()
+        else:
+            engine.splitPlace()
+        engine.initialize()
+        engine.FMPartition(passes,minImprove,stallMoves)
+    return seed, placement, engine.totalCutCost, engine.part
+
+def multiStart(netlist,runs,seed=30,processes=None,multilevelMode=False,passes=6,minImprove=1,stallMoves=None):
+    """ Run partitioning of a Netlist, or the netlist of an input file, runs times with seeds seed, seed+1... The first run uses the split placement
+        and the others a random initial split. Runs are spread over a pool of processes, one per CPU by default.
+        Returns the best result and the cut cost of every run """
+    starts = []
+    for run in range(0,runs):
+        placement = 'split' if run == 0 else 'rand'
+        starts.append((seed+run,placement,multilevelMode,passes,minImprove,stallMoves))
+
+    pool = multiprocessing.Pool(processes,_initWorker,(netlist,))
+    try:
+        results = pool.map(partitionStart,starts,chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    best = min(results,key=lambda r: r[2])
+    costs = [r[2] for r in results]
+    return best, costs
+
+def spread(costs):
+    """ Best, mean, worst and standard deviation of the run costs """
+    costs = np.array(costs)
+    return costs.min(), costs.mean(), costs.max(), costs.std()
@@ -0,0 +1,125 @@
+
+"""Multilevel partitioning in the style of hMETIS: coarsen, partition the coarsest Netlist, uncoarsen and refine"""
+import numpy as np
+from netlist import Netlist
+from fmEngine import FMEngine
+
+# Default stall cutoff of the uncoarsened levels. Projected partitions are already good, so long passes rarely pay off
+levelStallMoves = 200
+
+def heavyEdgeMatching(netlist,rand,maxWeight,rounds=4):
+    """ Match Cells in pairs along their heaviest connections. A connection weighs 1/(Net size-1),
+        every free Cell proposes to its heaviest free neighbor and mutual proposals are matched.
+        Returns the cluster of every Cell """
+    cells = netlist.cells
+    srcs, sinks, nets = netlist.connections()
+    connWeight = 1.0/(np.diff(netlist.netPtr)[nets]-1)
+
+    # Both directions of every connection, parallel connections add up their weight
+    pairs, pairIndex = np.unique(np.concatenate((srcs,sinks)).astype(np.int64)*cells + np.concatenate((sinks,srcs)),return_inverse=True)
+    pairWeight = np.bincount(pairIndex,weights=np.concatenate((connWeight,connWeight)))
+    # Random jitter breaks ties differently on every level
+    pairWeight += rand.random_sample(len(pairs))*1e-6
+    ends = (pairs//cells).astype(np.int32)
+    others = (pairs%cells).astype(np.int32)
+    heavy = (netlist.cellWeight[ends]+netlist.cellWeight[others] > maxWeight)
+
+    match = -np.ones(cells,dtype=np.int32)
+    for loop in range(0,rounds):
+        free = (match[ends]==-1) & (match[others]==-1) & ~heavy
+        if not free.any():
+            break
+        freeEnds = ends[free]
+        freeOthers = others[free]
+        # Heaviest free connection of every Cell
+        order = np.lexsort((-pairWeight[free],freeEnds))
+        proposers, first = np.unique(freeEnds[order],return_index=True)
+        proposal = -np.ones(cells,dtype=np.int32)
+        proposal[proposers] = freeOthers[order][first]
+        # Mutual proposals
+        mutual = proposers[(proposal[proposal[proposers]]==proposers) & (proposers<proposal[proposers])]
+        match[mutual] = proposal[mutual]
+        match[proposal[mutual]] = mutual
+
+    # Cluster named after its lowest Cell, singletons are their own cluster
+    leader = np.arange(cells,dtype=np.int32)
+    matched = (match!=-1)
+    leader[matched] = np.minimum(leader[matched],match[matched])
+    return np.unique(leader,return_inverse=True)[1].astype(np.int32)
+
+def coarsen(netlist,rand,maxWeight):
+    """ Coarser Netlist with one Cell per cluster and the cluster of every Cell """
+    clusterOf = heavyEdgeMatching(netlist,rand,maxWeight)
+    coarseCells = int(clusterOf.max())+1 if netlist.cells else 0
+    weights = np.bincount(clusterOf,weights=netlist.cellWeight,minlength=coarseCells).astype(np.int32)
+    srcs, sinks, nets = netlist.connections()
+    coarse = Netlist.fromPins(coarseCells,clusterOf[srcs],clusterOf[sinks],cellWeight=weights)
+    return coarse, clusterOf
+
+def coarsenLevels(netlist,rand,maxWeight,coarsestCells):
+    """ Coarsen the Netlist until at most coarsestCells Cells remain or matching no longer shrinks it.
+        Returns the levels, each finer Netlist with the cluster of its Cells, and the coarsest Netlist """
+    levels = []
+    current = netlist
+    while current.cells > coarsestCells:
+        coarse, clusterOf = coarsen(current,rand,maxWeight)
+        # Stop when matching no longer shrinks the Netlist
+        if coarse.cells > 0.95*current.cells:
+            break
+        levels.append((current,clusterOf))
+        current = coarse
+    return levels, current
+
+def multilevelPartition(netlist,seed=30,passes=6,coarsestCells=100,debugMode=False,listeners=None,placement='split',targetDif=0,minImprove=1,stallMoves=None,profile=False,deadline=None,boundary=False):
+    """ Coarsen the Netlist down to coarsestCells, place ('split' or 'rand') and partition the coarsest level with FM,
+        then project the partition back level by level and refine it with FM.
+        targetDif is the desired weight of partition A minus B. passes, minImprove and stallMoves schedule FM passes on every level.
+        listeners, profile and deadline are set on the FM Engine of every level, past the deadline levels are only projected and rebalanced.
+        boundary refines the uncoarsened levels in Boundary Mode.
+        Without stallMoves, passes of the uncoarsened levels end after levelStallMoves moves without a new best cut,
+        or after the default of Boundary Mode.
+        Returns the FM Engine of the original Netlist holding the final partition """
+    rand = np.random.RandomState(seed)
+    # Cluster weight limit keeps the coarsest level balanceable
+    maxWeight = max(2,int(netlist.cellWeight.sum())//coarsestCells)
+    levels, current = coarsenLevels(netlist,rand,maxWeight,coarsestCells)
+
+    engine = FMEngine(current,seed,debugMode)
+    engine.listeners = list(listeners or [])
+    engine.profile = profile
+    engine.deadline = deadline
+    engine.targetDif = targetDif
+    if placement == 'rand':
+        engine.randPlace()
+    else:
+        engine.splitPlace()
+    engine.initialize()
+    engine.FMPartition(passes,minImprove,stallMoves)
+    passCount = engine.passCount
+    moveCount = engine.moveCount
+    passStats = engine.passStats
+
+    levelStall = stallMoves
+    if levelStall is None and not boundary:
+        levelStall = levelStallMoves
+    for fine, clusterOf in reversed(levels):
+        part = engine.part[clusterOf]
+        engine = FMEngine(fine,seed,debugMode)
+        engine.listeners = list(listeners or [])
+        engine.profile = profile
+        engine.deadline = deadline
+        engine.boundaryMode = boundary
+        engine.targetDif = targetDif
+        engine.setPlacement(part)
+        engine.initialize()
+        engine.rebalance()
+        engine.FMPartition(passes,minImprove,levelStall)
+        passCount+=engine.passCount
+        moveCount+=engine.moveCount
+        passStats+=engine.passStats
+
+    # Counters of all levels
+    engine.passCount = passCount
+    engine.moveCount = moveCount
+    engine.passStats = passStats
+    return engine
@@ -0,0 +1,203 @@
+
+"""Array backed representation of the Circuit netlist"""
+import os
+import hashlib
+import numpy as np
+
+
+class Netlist():
+    """ Hypergraph of Cells and Nets stored as CSR index arrays
+        Net: Source Cell followed by its sink Cells. Nets are identified by their source,
+             input nets driven by the same Cell are merged and repeated sinks are dropped
+        netPtr, netCells: Cells of Net n are netCells[netPtr[n]:netPtr[n+1]], source first
+        cellPtr, cellNets: Nets of Cell c are cellNets[cellPtr[c]:cellPtr[c+1]]
+        cellWeight: Size of every Cell used for balance
+     """
+    def __init__(self,cells,netPtr,netCells,rows=0,cols=0,cellWeight=None,cellPtr=None,cellNets=None):
+
+        # Number of Cells to be partitioned
+        self.cells = cells
+        # Number of Nets
+        self.nets = len(netPtr)-1
+        # Number of Circuit Rows and Columns
+        self.rows = rows
+        self.cols = cols
+        # Number of available sites in the Circuit
+        self.sitesNum = self.rows*self.cols
+
+        self.netPtr = np.asarray(netPtr,dtype=np.int32)
+        self.netCells = np.asarray(netCells,dtype=np.int32)
+        if cellWeight is None:
+            cellWeight = np.ones(cells,dtype=np.int32)
+        self.cellWeight = np.asarray(cellWeight,dtype=np.int32)
+
+        # Net of every entry in netCells
+        netSizes = np.diff(self.netPtr)
+        self.pinNets = np.repeat(np.arange(self.nets,dtype=np.int32),netSizes)
+
+        # Transpose Net to Cell arrays into Cell to Net arrays, unless already given
+        if cellPtr is None:
+            order = np.argsort(self.netCells,kind='mergesort')
+            cellNets = self.pinNets[order]
+            cellPtr = np.zeros(cells+1,dtype=np.int32)
+            np.cumsum(np.bincount(self.netCells,minlength=cells),out=cellPtr[1:])
+        self.cellPtr = np.asarray(cellPtr,dtype=np.int32)
+        self.cellNets = np.asarray(cellNets,dtype=np.int32)
+
+    @classmethod
+    def fromFile(cls,inputfile,cache=False):
+        """ Parse Input File. First line is: cells nets rows cols
+            Then one line per Net: number of Cells, source Cell and sink Cells.
+            With cache the parsed arrays are stored in inputfile.npz and reused while the input file is unchanged """
+        if cache:
+            netlist = cls.loadCache(inputfile)
+            if netlist is not None:
+                return netlist
+
+        netlist = cls.parseFile(inputfile)
+
+        if cache:
+            netlist.saveCache(inputfile)
+        return netlist
+
+    @classmethod
+    def parseFile(cls,inputfile):
+        """ Parse the whole Input File at once into flat arrays. Raises ValueError on a short or out of range file """
+        fin = open(inputfile,'rb')
+        data = fin.read()
+        fin.close()
+
+        # All tokens are non-negative integers. Find the line of every token from the position of its first digit
+        tokens = np.fromstring(data,dtype=np.int64,sep=' ')
+        buf = np.frombuffer(data,dtype=np.uint8)
+        isDigit = (buf>=ord('0')) & (buf<=ord('9'))
+        tokenStarts = np.flatnonzero(isDigit[1:] & ~isDigit[:-1])+1
+        if len(buf) and isDigit[0]:
+            tokenStarts = np.concatenate(([0],tokenStarts))
+        tokenLines = np.cumsum(buf==ord('\n'))[tokenStarts]
+
+        # First token of every non-empty line
+        lineStarts = np.flatnonzero(np.diff(np.concatenate(([-1],tokenLines))) != 0)
+        if len(tokens) < 4:
+            raise ValueError("%s: Header needs the number of Cells, Nets, rows and columns" % inputfile)
+        cells, conns, rows, cols = tokens[0:4].tolist()
+        if len(lineStarts)-1 < conns:
+            raise ValueError("%s: Header gives %d Nets but only %d Net lines follow" % (inputfile,conns,len(lineStarts)-1))
+
+        # Net lines follow the header line: number of Cells, source Cell and sinks up to the number of Cells
+        netStarts = lineStarts[1:conns+1]
+        netEnds = np.concatenate((lineStarts[1:],[len(tokens)]))[1:conns+1]
+        short = np.flatnonzero(netEnds-netStarts-1 < tokens[netStarts])
+        if len(short):
+            raise ValueError("%s: Net line %d lists fewer Cells than its count %d" % (inputfile,short[0]+1,tokens[netStarts[short[0]]]))
+        tokenNet = np.repeat(np.arange(len(netStarts)),netEnds-netStarts)
+        tokenIndex = np.arange(netStarts[0],netEnds[-1]) if len(netStarts) else np.zeros(0,dtype=np.int64)
+        position = tokenIndex-netStarts[tokenNet]
+        isSink = (position>=2) & (position<=tokens[netStarts][tokenNet])
+
+        sinks = tokens[tokenIndex[isSink]].astype(np.int32)
+        srcs = tokens[netStarts+1][tokenNet[isSink]].astype(np.int32)
+
+        return cls.fromPins(cells,srcs,sinks,rows,cols)
+
+    @classmethod
+    def loadCache(cls,inputfile):
+        """ Netlist stored in inputfile.npz, None if missing or older than the input file """
+        cachefile = inputfile+'.npz'
+        if not os.path.exists(cachefile):
+            return None
+        stat = os.stat(inputfile)
+        arrays = np.load(cachefile)
+        try:
+            if arrays['source'].tolist() != [stat.st_size,int(stat.st_mtime)]:
+                return None
+            cells, rows, cols = arrays['shape'].tolist()
+            return cls(cells,arrays['netPtr'],arrays['netCells'],rows,cols,arrays['cellWeight'],arrays['cellPtr'],arrays['cellNets'])
+        finally:
+            arrays.close()
+
+    def saveCache(self,inputfile):
+        """ Store the Netlist arrays in inputfile.npz, skipped if the directory is not writable """
+        stat = os.stat(inputfile)
+        try:
+            fout = open(inputfile+'.npz','wb')
+        except IOError:
+            return
+        np.savez(fout,shape=np.array([self.cells,self.rows,self.cols]),source=np.array([stat.st_size,int(stat.st_mtime)]),
+                 netPtr=self.netPtr,netCells=self.netCells,cellWeight=self.cellWeight,cellPtr=self.cellPtr,cellNets=self.cellNets)
+        fout.close()
+
+    @staticmethod
+    def fileHash(inputfile):
+        """ SHA-1 hex digest of the contents of the input file, identifies the netlist independently of its path """
+        digest = hashlib.sha1()
+        fin = open(inputfile,'rb')
+        try:
+            for chunk in iter(lambda: fin.read(1<<20),''):
+                digest.update(chunk)
+        finally:
+            fin.close()
+        return digest.hexdigest()
+
+    def arrayHash(self):
+        """ SHA-1 hex digest of the Netlist arrays, identifies the Netlist a partition or checkpoint belongs to """
+        digest = hashlib.sha1()
+        digest.update(np.array([self.cells,self.nets]).tobytes())
+        digest.update(self.netPtr.tobytes())
+        digest.update(self.netCells.tobytes())
+        digest.update(self.cellWeight.tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def fromPins(cls,cells,srcs,sinks,rows=0,cols=0,cellWeight=None):
+        """ Build Netlist from source to sink connections. Connections with the same source form one Net.
+            Raises ValueError on Cells outside 0 to cells-1 """
+        for ends in (srcs,sinks):
+            if len(ends) and (ends.min() < 0 or ends.max() >= cells):
+                raise ValueError("Cell %d out of range, the Netlist has %d Cells" % (ends.min() if ends.min() < 0 else ends.max(),cells))
+        # Unique connections sorted by source then sink, without self loops
+        keep = (srcs != sinks)
+        pairs = np.unique(srcs[keep].astype(np.int64)*cells + sinks[keep])
+        srcs = (pairs//cells).astype(np.int32)
+        sinks = (pairs%cells).astype(np.int32)
+
+        netSrcs, netSinks = np.unique(srcs,return_counts=True)
+        netPtr = np.zeros(len(netSrcs)+1,dtype=np.int32)
+        np.cumsum(netSinks+1,out=netPtr[1:])
+
+        # Source goes in the first slot of its Net, sinks fill the rest
+        netCells = np.empty(netPtr[-1],dtype=np.int32)
+        isSrc = np.zeros(netPtr[-1],dtype=bool)
+        isSrc[netPtr[:-1]] = True
+        netCells[isSrc] = netSrcs
+        netCells[~isSrc] = sinks
+
+        return cls(cells,netPtr,netCells,rows,cols,cellWeight)
+
+    def starDegree(self):
+        """ Number of Cells connected to every Cell. A source connects to all its sinks and a sink to its source """
+        netSizes = np.diff(self.netPtr)
+        degree = np.bincount(self.netCells,minlength=self.cells)
+        np.add.at(degree,self.netCells[self.netPtr[:-1]],netSizes-2)
+        return degree
+
+    def connections(self):
+        """ Source Cell, sink Cell and Net of every source to sink connection """
+        isSrc = np.zeros(len(self.netCells),dtype=bool)
+        isSrc[self.netPtr[:-1]] = True
+        sinks = self.netCells[~isSrc]
+        nets = self.pinNets[~isSrc]
+        srcs = self.netCells[self.netPtr[:-1]][nets]
+        return srcs, sinks, nets
+
+    def starAdjacency(self):
+        """ CSR arrays of the Cells connected to every Cell. A Cell connected to another one
+            as both source and sink is listed twice """
+        srcs, sinks, nets = self.connections()
+        ends = np.concatenate((srcs,sinks))
+        others = np.concatenate((sinks,srcs))
+        order = np.argsort(ends,kind='mergesort')
+        starCells = others[order]
+        starPtr = np.zeros(self.cells+1,dtype=np.int32)
+        np.cumsum(np.bincount(ends,minlength=self.cells),out=starPtr[1:])
+        return starPtr, starCells
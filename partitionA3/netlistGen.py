@@ -0,0 +1,111 @@
+
+"""Synthetic netlist generator with controllable size, fanout distribution and Rent-like locality"""
+import sys
+import getopt
+import numpy as np
+
+
+def generate(cells,nets=None,fanoutExp=2.5,maxFanout=50,rent=0.6,seed=30):
+    """ Random netlist of cells Cells laid out on a square grid in index order.
+        nets: Number of Nets, each driven by a different Cell, default 0.95 of the Cells
+        fanoutExp: Sinks per Net follow a Zipf distribution of this exponent, larger is fewer high fanout Nets
+        maxFanout: Largest number of sinks of a Net
+        rent: Rent exponent between 0 and 1. Sinks are placed at a grid distance l from their source with
+              probability proportional to l^(2*rent-4), small exponents keep connections local
+        Returns the source and sink of every connection and the rows and columns of the placement grid """
+    if nets is None:
+        nets = int(0.95*cells)
+    if not 0 < rent < 1:
+        raise ValueError("Rent exponent %s is not between 0 and 1" % rent)
+    if nets > cells:
+        raise ValueError("%d Nets need as many source Cells, only %d Cells" % (nets,cells))
+    rand = np.random.RandomState(seed)
+
+    netSrcs = rand.permutation(cells)[:nets].astype(np.int32)
+    fanouts = np.minimum(rand.zipf(fanoutExp,nets),max(1,min(maxFanout,cells-1)))
+    srcs = np.repeat(netSrcs,fanouts)
+
+    # Connection lengths by inverse transform sampling of l^a on [1,side]
+    side = int(np.ceil(np.sqrt(cells)))
+    a1 = 2*rent-3
+    lengths = ((side**a1-1)*rand.random_sample(len(srcs))+1)**(1.0/a1)
+    angles = 2*np.pi*rand.random_sample(len(srcs))
+    x = np.clip(np.rint(srcs%side+lengths*np.cos(angles)),0,side-1).astype(np.int64)
+    y = np.clip(np.rint(srcs//side+lengths*np.sin(angles)),0,side-1).astype(np.int64)
+    # Grid positions past the last Cell wrap around
+    sinks = ((y*side+x)%cells).astype(np.int32)
+
+    # Placement grid of the GUI, with room for the Cells on each half
+    cols = 2*int(np.ceil(np.sqrt(0.7*cells)))
+    rows = int(np.ceil(1.4*cells/cols))
+    return srcs, sinks, rows, cols
+
+def writeNetlist(outputfile,cells,srcs,sinks,rows,cols):
+    """ Write connections in the input file format, one line per source: number of Cells, source and sinks.
+        Connections must be grouped by source """
+    starts = np.flatnonzero(np.concatenate(([True],srcs[1:] != srcs[:-1])))
+    ends = np.concatenate((starts[1:],[len(srcs)]))
+    fout = open(outputfile,'w')
+    fout.write("%d %d %d %d\n" % (cells,len(starts),rows,cols))
+    sinkList = sinks.tolist()
+    for start, end in zip(starts.tolist(),ends.tolist()):
+        fout.write("%d %d %s\n" % (end-start+1,srcs[start],' '.join(map(str,sinkList[start:end]))))
+    fout.close()
+
+
+def main(argv):
+    #=================Options=================#
+    # Default Values
+    cells = None
+    nets = None
+    fanoutExp = 2.5
+    maxFanout = 50
+    rent = 0.6
+    seed = 30
+    outputfile = None
+
+    try:
+        opts, args = getopt.getopt(argv, "hn:e:a:f:p:s:o:")
+    except getopt.GetoptError:
+        print 'netlistGen.py -n <Cells> -o <outputfile>'
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            print 'netlistGen.py -n <Cells> -o <outputfile> [-e <Nets>] [-a <Exponent>] [-f <Fanout>] [-p <Rent>] [-s <Seed>]'
+            print "-n <Cells>: Number of Cells"
+            print "-e <Nets>: Number of Nets, default 0.95 of the Cells"
+            print "-a <Exponent>: Zipf exponent of the Net fanout, default 2.5"
+            print "-f <Fanout>: Largest Net fanout, default 50"
+            print "-p <Rent>: Rent exponent of the connection locality, between 0 and 1, default 0.6"
+            print "-s <Seed>: Random seed"
+            sys.exit()
+        elif opt == '-n':
+            cells = int(arg)
+        elif opt == '-e':
+            nets = int(arg)
+        elif opt == '-a':
+            fanoutExp = float(arg)
+        elif opt == '-f':
+            maxFanout = int(arg)
+        elif opt == '-p':
+            rent = float(arg)
+        elif opt == '-s':
+            seed = int(arg)
+        elif opt == '-o':
+            outputfile = arg
+
+    if not cells or not outputfile:
+        print 'netlistGen.py -n <Cells> -o <outputfile>'
+        sys.exit(2)
+
+    try:
+        srcs, sinks, rows, cols = generate(cells,nets,fanoutExp,maxFanout,rent,seed)
+    except ValueError as error:
+        print error
+        sys.exit(2)
+    writeNetlist(outputfile,cells,srcs,sinks,rows,cols)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,162 @@
+
+"""Parallel boundary refinement: FM on independent regions of the cut boundary, run on a process pool
+and merged within the balance tolerance"""
+import random
+import multiprocessing
+from collections import deque
+import numpy as np
+from netlist import Netlist
+from fmEngine import FMEngine
+from kway import kwayCutCost
+
+# Region size limit of the cut pins divided by defaultRegions. Fixed, so the result does not depend on the number of processes
+defaultRegions = 64
+
+
+def netlistLists(netlist):
+    """ Netlist arrays as lists for the breadth first search of boundaryRegions, built once for all rounds """
+    return netlist.netPtr.tolist(), netlist.netCells.tolist(), netlist.cellPtr.tolist(), netlist.cellNets.tolist()
+
+def boundaryRegions(netlist,part,maxCells,seed=30,lists=None):
+    """ Split the Cells around the cut into regions that share no Cells or Nets.
+        A region grows from a cut Net in breadth first order along cut Nets. A Cell joins when none of its Nets
+        belongs to another region and brings all its Nets along, Cells on a cut Net also bring the Cells of
+        their uncut Nets. Cells on the Nets of a region that cannot join it stay fixed, so growth often stops
+        well below maxCells. lists are the netlistLists of the Netlist, built when not given.
+        Returns the Cells of every region """
+    netPtr, netCells, cellPtr, cellNets = lists or netlistLists(netlist)
+    sidesB = np.bincount(netlist.pinNets,weights=part[netlist.netCells],minlength=netlist.nets)
+    cutNets = (sidesB>0) & (sidesB<np.diff(netlist.netPtr))
+    cut = cutNets.tolist()
+    starts = np.flatnonzero(cutNets).tolist()
+    random.Random(seed).shuffle(starts)
+
+    netOwner = [-1]*netlist.nets
+    cellOwner = [-1]*netlist.cells
+    regions = []
+    for start in starts:
+        if netOwner[start] != -1:
+            continue
+        region = len(regions)
+        cells = []
+        # Nets to visit, uncut Nets are only visited one Net away from the cut
+        queue = deque([start])
+        while queue and len(cells) < maxCells:
+            net = queue.popleft()
+            for cell in netCells[netPtr[net]:netPtr[net+1]]:
+                if cellOwner[cell] != -1:
+                    continue
+                nets = cellNets[cellPtr[cell]:cellPtr[cell+1]]
+                if any(netOwner[n] != -1 and netOwner[n] != region for n in nets):
+                    continue
+                cellOwner[cell] = region
+                cells.append(cell)
+                for n in nets:
+                    if netOwner[n] == -1:
+                        netOwner[n] = region
+                        if cut[net] or cut[n]:
+                            queue.append(n)
+                if len(cells) >= maxCells:
+                    break
+        if cells:
+            regions.append(np.array(cells,dtype=np.int32))
+    return regions
+
+def regionConnections(netlist,regions,connections):
+    """ Connections of the Nets of every region, between the region Cells and the fixed Cells on its Nets.
+        Yields the Cells on the Nets of the region, the connections numbered by those Cells and the region Cells among them """
+    srcs, sinks, connNets = connections
+    cellRegion = -np.ones(netlist.cells,dtype=np.int32)
+    cellRegion[np.concatenate(regions)] = np.repeat(np.arange(len(regions),dtype=np.int32),[len(region) for region in regions])
+    # Region of every Net, Nets of a region only hold its Cells and fixed Cells
+    netRegion = -np.ones(netlist.nets,dtype=np.int32)
+    pinRegion = cellRegion[netlist.netCells]
+    owned = (pinRegion>=0)
+    netRegion[netlist.pinNets[owned]] = pinRegion[owned]
+    # Pins and connections grouped by region
+    pinOrder = np.argsort(netRegion[netlist.pinNets],kind='mergesort')
+    pinBounds = np.searchsorted(netRegion[netlist.pinNets][pinOrder],np.arange(len(regions)+1))
+    connOrder = np.argsort(netRegion[connNets],kind='mergesort')
+    connBounds = np.searchsorted(netRegion[connNets][connOrder],np.arange(len(regions)+1))
+    for index, region in enumerate(regions):
+        cells = np.unique(netlist.netCells[pinOrder[pinBounds[index]:pinBounds[index+1]]]).astype(np.int32)
+        conns = connOrder[connBounds[index]:connBounds[index+1]]
+        yield (cells,np.searchsorted(cells,srcs[conns]).astype(np.int32),np.searchsorted(cells,sinks[conns]).astype(np.int32),
+               np.searchsorted(cells,region).astype(np.int32))
+
+def _refineRegion(task):
+    """ Run FM on the movable Cells of a region. Every Net keeps its source, so the Netlist of the region
+        has the same Nets. The balance is checked against the weight difference of the whole Netlist, dif.
+        Returns the moved Cells, the cut improvement and the change of the difference """
+    cells, srcs, sinks, movable, weights, part, dif, tolerance, seed, passes, minImprove, stallMoves = task
+    engine = FMEngine(Netlist.fromPins(len(cells),srcs,sinks,cellWeight=weights),seed)
+    engine.setPlacement(part)
+    startDif = engine.sizes[0]-engine.sizes[1]
+    engine.targetDif = startDif-dif
+    engine.tolerance = tolerance
+    engine.joining = False
+    engine.initialize(movable)
+    startCost = engine.totalCutCost
+    engine.FMPartition(passes,minImprove,stallMoves)
+    moved = np.flatnonzero(engine.part != part)
+    return cells[moved], startCost-engine.totalCutCost, engine.sizes[0]-engine.sizes[1]-startDif
+
+def parallelRefine(netlist,part,seed=30,processes=None,rounds=4,passes=6,minImprove=1,stallMoves=None,regionCells=None,targetDif=0):
+    """ Refine a 2-way partition with FM on regions of the cut boundary that share no Cells or Nets, so their
+        moves change the cut independently. Regions run on a pool of processes, None is one per CPU.
+        Improved regions are merged best first while the weight difference of A minus B stays within the
+        balance tolerance of the FM Engine around targetDif. Every round splits the boundary again, rounds stop
+        once the cut improves by less than minImprove.
+        regionCells: Most Cells of a region, by default the cut pins over defaultRegions and at least 100.
+            Regions stop growing at Cells of other regions, so there are usually many more regions than defaultRegions
+        Returns the partition of every Cell and the cut cost """
+    part = np.array(part,dtype=np.int8)
+    weights = netlist.cellWeight
+    tolerance = 2*int(weights.max()) if netlist.cells else 2
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    cost = kwayCutCost(netlist,part,2)
+    connections = netlist.connections()
+    lists = netlistLists(netlist)
+
+    pool = None
+    if processes != 1:
+        pool = multiprocessing.Pool(processes)
+    try:
+        for loop in range(0,rounds):
+            maxCells = regionCells
+            if maxCells is None:
+                sidesB = np.bincount(netlist.pinNets,weights=part[netlist.netCells],minlength=netlist.nets)
+                cutPins = np.count_nonzero(((sidesB>0) & (sidesB<np.diff(netlist.netPtr)))[netlist.pinNets])
+                maxCells = max(100,cutPins//defaultRegions)
+            regions = boundaryRegions(netlist,part,maxCells,seed+loop,lists)
+            if not regions:
+                break
+            sizes = np.bincount(part,weights=weights,minlength=2)
+            dif = int(sizes[0]-sizes[1])-targetDif
+            # Largest regions first for an even load
+            regions.sort(key=len,reverse=True)
+            tasks = [(cells,srcs,sinks,movable,weights[cells],part[cells],dif,tolerance,seed,passes,minImprove,stallMoves)
+                     for cells, srcs, sinks, movable in regionConnections(netlist,regions,connections)]
+            if pool is None:
+                results = map(_refineRegion,tasks)
+            else:
+                results = pool.map(_refineRegion,tasks,chunksize=1)
+
+            # Best improvements first, a region is skipped if its moves would unbalance the partitions
+            improvement = 0
+            for moved, gain, shift in sorted(results,key=lambda r: -r[1]):
+                if gain <= 0:
+                    break
+                if abs(dif+shift) <= max(tolerance,abs(dif)):
+                    part[moved] = 1-part[moved]
+                    dif+= shift
+                    improvement+= gain
+            cost-= improvement
+            if improvement < max(minImprove,1):
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return part, cost
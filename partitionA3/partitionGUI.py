@@ -1,46 +1,657 @@
 
-"""Based on the graphics.py module"""
-class Block():
+"""Graphical interface of the partitioning tool. Only imported when running with graphics"""
+import time
+import random
+import threading
+import numpy as np
+import Tkinter as tk
+import matplotlib.pyplot as plt
+from netlist import Netlist
+from fmEngine import FMEngine
+from multilevel import multilevelPartition
+from fmListeners import FMListener
+from graphLayout import cachedLayout
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2TkAgg
 
-    stateDict = {'free':0,'ocp':-1}
+
+class Partition():
+    """ Circuit Cell partitioning using Fiduccia-Matheyses
+        Circuit: A representation of a circuit by Cells to be partitioned in two sites
+        Cell: Circuit component with connections to other Cells through Nets
+        Netlist: Array representation of Cells and Nets used by the FM Engine
+        Node: Graph representation of a Cell or a cluster of Cells, only built to display the Graph
+        Site: Possible location for a Cell (Is Free or is occupied by a Cell)
+        Circuit View: Drawing of the Sites and the Cells placed on them
+     """  
+    def __init__(self,master,seed,inputfile,debugMode=False,multilevelMode=False):
+        
+        #=============Parse file to create cells netlist===============#
+        self.netlist = Netlist.fromFile(inputfile)
+        self.cells = self.netlist.cells
+        self.rows = self.netlist.rows
+        self.cols = self.netlist.cols
+        self.sitesNum = self.netlist.sitesNum
+        # Graph layout of the Netlist, computed off the Tk thread when displayed
+        self.layout = None
+        self.layoutWorker = None
+        self.layoutError = None
+        # Nodes of the Graph view, larger Netlists are shown as clusters of Cells. Node names shown up to labelNodes
+        self.graphNodes = 500
+        self.labelNodes = 100
+        # FM Engine running on the netlist arrays
+        self.engine = FMEngine(self.netlist,seed,debugMode)
+                
+        #================Create Data Structures================# 
+        # Assign Initial Seed
+        self.seed = seed
+        # Multilevel Mode coarsens the netlist before partitioning and refines while uncoarsening
+        self.multilevel = multilevelMode
+        # Cost samples written by the partitioning thread and plotted by the Tk thread
+        self.samples = CostSamples()
+        # Partitioning thread and cost plot refresh period in ms, at most 10 frames per second
+        self.worker = None
+        self.frameTime = 100
+        #================Draw Buttons and plots================#
+        self.master = master
+        self.initialize_buttons()
+        self.initialize_plots()
+
+    def initialize_buttons(self):
+        """ Draw User Buttons on top of interface 
+            Start: Begin placement process
+            Pause: Pause process. Allows continuing. Disabled while a multilevel run goes through its levels
+            Graph: Show Graph nodes to visualize connections
+            Plot: Show Cost plot to see SA progress
+            Draw: Show Circuit Cells while partitioning
+        """
+        self.start_button = tk.Button(self.master, text='Start', command = self.startRunning)
+        self.start_button.grid(row=0, column=0)
+
+        self.pause_button = tk.Button(self.master, text='Pause', command = self.pauseRunning)
+        self.pause_button.grid(row=0, column=1)
+
+        self.graph_button = tk.Button(self.master, text='Graph', command = self.showGraph)
+        self.graph_button.grid(row=0, column=2)
+        
+        self.plot_button = tk.Button(self.master, text='Plot', command = self.showPlot)
+        self.plot_button.grid(row=0, column=3)
+        
+        self.draw_button = tk.Button(self.master, text='Draw', command = self.drawCells)
+        self.draw_button.grid(row=0, column=4)
+        
+        # Initialize Button States and Actions
+        self.pause_button['state'] = 'disabled'
+        # Boolean switch to control flow of placement process
+        self.running = False
+        # Boolean switch to plot cost and draw placement while partitioning, turn off for faster processing
+        self.plot = False
+        self.drawing = False
+        self.graph = False
+        # Boolean switch to specify first run and allow stop/continue behavior that doesn't initialize program
+        self.firstRun = True
+
+    def initialize_plots(self):
+        """ Draw all graphic components as Canvases
+            Circuit Canvas: Drawing of the Circuit Sites Rows and Columns to overlay Cell Placement and Connections
+            Graph Canvas: Drawing of the Graph structure used for the representation of the Cells
+            Cost Plot Canvas: Plotting of the Cost Function used in the Annealing Process
+            Plot Toolbar: Toolbar options to explore the Graph and Cost Canvases (Zoom, Save, Move...)
+         """
+        #============================Draw circuit canvas=================================#
+        # Draw Canvas with hardcoded width 600 and adjustable height to circuit input
+        ckt_max_x = 600
+        ckt_max_y = int(min(max(ckt_max_x*(2*self.rows-1.0)/(self.cols+1),150),600))
+        self.canvasCirkt = tk.Canvas(self.master,width=ckt_max_x,height=ckt_max_y,background="white")
+        self.canvasCirkt.grid(row=1,column=1,columnspan=4)
+        self.circuit = CircuitView(self.canvasCirkt,self.netlist,ckt_max_x,ckt_max_y,self.seed)
+        self.circuit.render()
+
+        #===================================Draw Plots================================#
+        # Draw Figure for 2 subplots (Connections Graph and Cost Function)        
+        self.figure, self.axes = plt.subplots(2, facecolor="white")
+        self.figure.set_figwidth(4)
+        self.axGraph = self.axes[0]
+        self.axCost = self.axes[1]
+        
+        # Initial condition for connection Graph
+        self.axGraph.set_visible(False)
+        
+        # Select Cost Plot as current Axis. Get lines to use for plot updates
+        plt.sca(self.axCost)       
+        self.lines, = self.axCost.plot([],[])
+        self.axCost.set_xlabel("Time")
+        self.axCost.set_title("Cost")
+
+        # Draw Cost function Plot
+        self.canvasPlot = FigureCanvasTkAgg(self.figure, master=self.master)
+        self.canvasPlot.get_tk_widget().grid(row=1,column=0)
+        
+        # Draw Tool Bar
+        self.toolbarFrame = tk.Frame(self.master)
+        self.toolbarFrame.grid(row=2,column=0,columnspan=3,sticky="W")
+        self.toolbarPlot = NavigationToolbar2TkAgg(self.canvasPlot,self.toolbarFrame)
+           
+    def showGraph(self):
+        """ User selection to display graph. The layout is read from the layout cache or computed by a thread """
+        self.graph_button['state'] = 'disabled'
+        self.axGraph.set_visible(True)
+        self.axGraph.set_axis_off()
+        self.axGraph.set_title("Computing layout...")
+        self.canvasPlot.draw_idle()
+        self.layoutError = None
+        self.layoutWorker = threading.Thread(target=self._computeLayout)
+        self.layoutWorker.daemon = True
+        self.layoutWorker.start()
+        self.master.after(self.frameTime,self.pollGraph)
+
+    def _computeLayout(self):
+        try:
+            self.layout = cachedLayout(self.netlist,self.graphNodes,self.seed)
+        except Exception as error:
+            self.layoutError = "%s: %s" % (type(error).__name__,error)
+
+    def pollGraph(self):
+        """ Draw the Graph once its layout is ready. A failed layout is shown in the title and Graph can be retried """
+        if self.layoutWorker.is_alive():
+            self.master.after(self.frameTime,self.pollGraph)
+            return
+        if self.layoutError is not None:
+            self.axGraph.set_title("Layout failed, %s" % self.layoutError)
+            self.canvasPlot.draw_idle()
+            self.graph_button['state'] = 'normal'
+            return
+        self.drawGraph()
+
+    def drawGraph(self):
+        """ Draw connection Graph, all edges as one collection and all nodes as another """
+        pos, weights, edges, clusterOf = self.layout
+        self.axGraph.cla()
+        self.axGraph.set_axis_off()
+        self.axGraph.add_collection(LineCollection(pos[edges],colors='gray',linewidths=0.5,alpha=0.6,zorder=1))
+        # Node area shrinks with the number of nodes and grows with the Cells of its cluster
+        self.axGraph.scatter(pos[:,0],pos[:,1],s=min(40.0,2000.0/len(pos))*np.sqrt(weights),zorder=2)
+        shown = np.count_nonzero(clusterOf >= 0)
+        if len(pos) == self.cells:
+            if len(pos) <= self.labelNodes:
+                for node in range(0,len(pos)):
+                    self.axGraph.text(pos[node,0],pos[node,1],str(node),fontsize=7,ha='center',va='center',zorder=3)
+            self.axGraph.set_title("%d Cells" % self.cells)
+        elif shown == self.cells:
+            self.axGraph.set_title("%d clusters of %d Cells" % (len(pos),self.cells))
+        else:
+            self.axGraph.set_title("%d clusters, %d of %d Cells" % (len(pos),shown,self.cells))
+        self.axGraph.set_xlim(-0.05,1.05)
+        self.axGraph.set_ylim(-0.05,1.05)
+        self.canvasPlot.draw_idle()
+
+
+    def showPlot(self):
+        """ User selection to display Cost """
+        self.plot = not self.plot
+        if self.plot:
+            self.plot_button['text'] = "No Plot"
+        else:
+            self.plot_button['text'] = "Plot"
     
-    def __init__(self,canvas,p,index,rows,cols):
-        
-        self.index = index
-        self.state = self.stateDict['free']
-        self.cell = -1
-        self.p1X = (p[0])
-        self.p1Y = (p[1])
-        self.p2X = (p[2])
-        self.p2Y = (p[3])
-        self.blockX = self.index%cols
-        self.blockY = (self.index-self.blockX)//cols
-        canvas.create_rectangle(*p, fill="white")
+    def drawCells(self):
+        """ User selection to display Circuit Cells """
+        self.drawing = not self.drawing
+        if self.drawing:
+            self.draw_button['text'] = "No Draw"
+        else:
+            self.draw_button['text'] = "Draw"
+
+    def startRunning(self):
+        """ User control for placement process """
+        # A paused run starts again once its thread has stopped
+        if self.worker is not None and self.worker.is_alive():
+            return
+        self.start_button['state'] = 'disabled'
+        # The levels of a multilevel run cannot be continued, it runs without Pause
+        self.pause_button['state'] = 'disabled' if self.multilevel and self.firstRun else 'normal'
+        self.running = True
+        
+        # If first run and not continuation from pause
+        if (self.firstRun):
+            self.start_timer = time.clock()
+        # Partitioning runs off the Tk thread, the cost plot is refreshed from its samples
+        self.worker = threading.Thread(target=self._startpartition)
+        self.worker.daemon = True
+        self.worker.start()
+        self.master.after(self.frameTime,self.pollPartition)
+
+    def pollPartition(self):
+        """ Refresh the cost plot while the partitioning thread runs, then display the result """
+        self.updatePlot()
+        if self.drawing:
+            self.updateDraw()
+        if self.worker.is_alive():
+            self.master.after(self.frameTime,self.pollPartition)
+            return
+        # Always display result at the end of the process
+        self.updateDraw()
+        if not self.running:
+            # Paused, Start continues the interrupted pass
+            self.start_button['state'] = 'normal'
+            return
+        # Disable Buttons when finished
+        self.pause_button['state'] = 'disabled'
+        self.plot_button['state'] = 'disabled'
+        self.draw_button['state'] = 'disabled'
+
+    def pauseRunning(self):
+        """ Pause partitioning, the FM Engine stops at the best cut of its current pass. Start is enabled
+            again once the partitioning thread has stopped """
+        self.pause_button['state'] = 'disabled'
+        self.running = False
+        self.engine.stopped = True
+        
+    def _startpartition(self):
+        """ Start Partitioning Process """
+        
+        listener = CostPlotListener(self)
+        
+        if self.multilevel and self.firstRun:
+            startTimer = time.clock()
+            self.engine = multilevelPartition(self.netlist,self.seed,debugMode=self.engine.debug,listeners=[listener])
+            self.firstRun=False
+            self.totalCutCost = self.engine.totalCutCost
+        else:
+            # On first run to split placement. This allows pausing and continuing the process
+            if (self.firstRun == True):
+                self.engine.splitPlace()
+                self.engine.initialize()
+                self.firstRun=False
             
-    def getBlockXY(self,cols,rows):
-        """ Remainder and Floored Quotient return Cell coordinates """
-        return self.blockX , self.blockY
-    
-    def getIndex(self):
-        return self.index
-    
-    def setCell(self,cell):
-        self.state = self.stateDict["ocp"]
-        self.cell = cell
+            self.engine.listeners = [listener]
+            self.engine.stopped = False
+            
+            startTimer = time.clock()
+            
+            self.totalCutCost = self.engine.FMPartition()
         
-    def getCell(self):
-        return self.cell
+        timeDif = time.clock() - startTimer
+        
+        print self.totalCutCost, " ",
+        print timeDif
 
-    def getCenter(self):
-        return (self.p1X+self.p2X)/2.0, (self.p1Y+self.p2Y)/2.0
-                
-    def isFree(self):
-        return (self.state == self.stateDict['free'])
+    def plotMove(self,cost,bestCost):
+        """ Store the cost of every move for the next plot refresh """
+        self.samples.append(time.clock() - self.start_timer,cost,bestCost)
+
+    def updateDraw(self):
+        """ Draw the Cells moved since the last update """
+        self.circuit.update(self.engine.part)
     
-    def isOcp(self):
-        return (self.state == self.stateDict['ocp'])
-        
-    def free(self):
-        self.state = self.stateDict['free']
-        self.cell = -1
-    
\ No newline at end of file
+    def updatePlot(self):
+        """ Cost plot gets updated with the samples stored since the last refresh """
+        times, costs, bestCost = self.samples.view()
+        if len(times) == len(self.lines.get_xdata()):
+            return
+        self.lines.set_data(times,costs)
+        self.axCost.set_title("Best Cost=" + str(bestCost))
+        # Re-scale
+        self.axCost.relim()
+        self.axCost.autoscale_view()
+        # Redraw when Tk is idle
+        self.canvasPlot.draw_idle()
+
+
+    def quitApp(self):
+        """ Exit """
+        self.master.destroy()
+        self.master.quit()
+
+
+class CostSamples():
+    """ Growable buffer of move times and costs. Capacity doubles when full, so appending is amortized O(1).
+        Samples are only written past the count, views of the stored samples stay valid after growing """
+    def __init__(self,size=1024):
+        self.times = np.zeros(size)
+        self.costs = np.zeros(size,dtype=np.int32)
+        self.count = 0
+        self.bestCost = None
+        self.lock = threading.Lock()
+
+    def append(self,timer,cost,bestCost):
+        with self.lock:
+            if self.count == len(self.times):
+                self.times = np.concatenate((self.times,np.zeros(len(self.times))))
+                self.costs = np.concatenate((self.costs,np.zeros(len(self.costs),dtype=np.int32)))
+            self.times[self.count] = timer
+            self.costs[self.count] = cost
+            self.bestCost = bestCost
+            self.count+=1
+
+    def view(self):
+        """ Stored times, costs and the last best cost """
+        with self.lock:
+            return self.times[:self.count], self.costs[:self.count], self.bestCost
+
+
+class CostPlotListener(FMListener):
+    """ Send the cost of every move to the GUI cost plot """
+    def __init__(self,gui):
+        self.gui = gui
+
+    def onMove(self,engine,cost,bestCost):
+        self.gui.plotMove(cost,bestCost)
+
+
+class CircuitView():
+    """ Level of detail drawing of the Cells placed on the Sites of both partitions.
+        Sites are laid out in world units, one unit per Site with an empty channel below every row and
+        between the partitions. Zoomed out, Cells are aggregated in a heat map of their density, partition
+        and share on the cut. Zoomed in until Sites are detailSize pixels wide, the Sites, Cells, Tags and
+        connections inside the viewport are drawn as Canvas items, and only the items of moved Cells are updated.
+        Mouse wheel zooms, dragging pans and double click shows the whole circuit """
+    # Pixels per Site from which Sites are drawn, and Cell Tags
+    detailSize = 8
+    tagSize = 24
+    # Pixels per heat map bin
+    binSize = 3
+    # Most connections drawn, and most moved Cells updated one by one instead of redrawing the viewport
+    maxLines = 4000
+    maxMoves = 300
+    # Colors of the partitions and the cut
+    colorA = np.array([70,130,180])
+    colorB = np.array([60,179,113])
+    colorCut = np.array([220,20,60])
+
+    def __init__(self,canvas,netlist,width,height,seed):
+        self.canvas = canvas
+        self.netlist = netlist
+        self.cells = netlist.cells
+        self.rows = netlist.rows
+        self.cols = netlist.cols
+        self.width = width
+        self.height = height
+        self.random = random.Random(seed)
+
+        # World position and partition of every Site, partition B past the half of the columns
+        self.half = self.cols//2
+        sites = np.arange(self.rows*self.cols)
+        cols = sites%self.cols
+        self.siteSide = (cols >= self.half).astype(np.int8)
+        self.siteX = cols+self.siteSide
+        self.siteY = 2*(sites//self.cols)
+        self.worldX = self.cols+1
+        self.worldY = max(2*self.rows-1,1)
+        # Cell on every Site and Site of every Cell, -1 when free or not placed
+        self.siteCell = np.full(len(sites),-1,dtype=np.int32)
+        self.cellSite = np.full(self.cells,-1,dtype=np.int32)
+        # Partition currently drawn
+        self.shown = None
+
+        # Source to sink connections and the connections of every Cell
+        self.connSrcs, self.connSinks, nets = netlist.connections()
+        ends = np.concatenate((self.connSrcs,self.connSinks))
+        order = np.argsort(ends,kind='mergesort')
+        self.cellConns = np.tile(np.arange(len(self.connSrcs),dtype=np.int32),2)[order]
+        self.cellConnPtr = np.zeros(self.cells+1,dtype=np.int32)
+        np.cumsum(np.bincount(ends,minlength=self.cells),out=self.cellConnPtr[1:])
+
+        # Canvas items of the viewport by Site and connection
+        self.siteItems = {}
+        self.connItems = {}
+        self.heatImage = None
+        self.fit()
+
+        canvas.bind('<ButtonPress-1>',self.onPress)
+        canvas.bind('<B1-Motion>',self.onDrag)
+        canvas.bind('<ButtonRelease-1>',self.onRelease)
+        canvas.bind('<Double-Button-1>',self.onFit)
+        canvas.bind('<MouseWheel>',self.onWheel)
+        canvas.bind('<Button-4>',self.onWheel)
+        canvas.bind('<Button-5>',self.onWheel)
+
+    #==========================Viewport==========================#
+    def fit(self):
+        """ Viewport showing the whole circuit """
+        self.fitScale = min(float(self.width)/self.worldX,float(self.height)/self.worldY)
+        self.scale = self.fitScale
+        self.originX = 0.0
+        self.originY = 0.0
+
+    def zoomAt(self,x,y,factor):
+        """ Zoom keeping the world point under the canvas pixel x,y in place """
+        worldX = self.originX+x/self.scale
+        worldY = self.originY+y/self.scale
+        self.scale = min(max(self.scale*factor,self.fitScale),4.0*self.tagSize)
+        self.originX = worldX-x/self.scale
+        self.originY = worldY-y/self.scale
+
+    def detailed(self):
+        return self.scale >= self.detailSize
+
+    def visibleSites(self):
+        """ Sites inside the viewport """
+        right = self.originX+self.width/self.scale
+        bottom = self.originY+self.height/self.scale
+        # Rows 2*row to 2*row+1 and columns x to x+1 overlapping the viewport
+        rows = np.arange(max(int(np.floor((self.originY-1)/2.0))+1,0),min(int(np.ceil(bottom/2.0)),self.rows))
+        colX = self.siteX[:self.cols]
+        cols = np.flatnonzero((colX+1 > self.originX) & (colX < right))
+        return (rows[:,None]*self.cols+cols[None,:]).ravel()
+
+    def isVisible(self,site):
+        if site < 0:
+            return False
+        x = (self.siteX[site]-self.originX)*self.scale
+        y = (self.siteY[site]-self.originY)*self.scale
+        return x+self.scale > 0 and x < self.width and y+self.scale > 0 and y < self.height
+
+    def siteBox(self,site):
+        x = (self.siteX[site]-self.originX)*self.scale
+        y = (self.siteY[site]-self.originY)*self.scale
+        return x, y, x+self.scale-1, y+self.scale-1
+
+    def siteCenter(self,site):
+        return (self.siteX[site]+0.5-self.originX)*self.scale, (self.siteY[site]+0.5-self.originY)*self.scale
+
+    #==========================Placement==========================#
+    def place(self,part,cells=None):
+        """ Random placement, for every Cell, or the given Cells, a free Site on its partition is assigned """
+        rand = np.random.RandomState(self.random.randint(0,2**31-1))
+        if cells is None:
+            cells = np.arange(self.cells)
+        sites = self.cellSite[cells]
+        self.siteCell[sites[sites >= 0]] = -1
+        self.cellSite[cells] = -1
+        for side in (0,1):
+            sideCells = cells[part[cells] == side]
+            sites = np.flatnonzero((self.siteSide == side) & (self.siteCell < 0))
+            sites = sites[rand.permutation(len(sites))[:len(sideCells)]]
+            # Cells without a free Site are not drawn
+            self.cellSite[sideCells[:len(sites)]] = sites
+            self.siteCell[sites] = sideCells[:len(sites)]
+
+    def moveCell(self,cell,side):
+        """ Move a Cell to a random free Site of its new partition """
+        site = self.cellSite[cell]
+        if site >= 0:
+            self.siteCell[site] = -1
+        first, last = (self.half,self.cols-1) if side else (0,self.half-1)
+        for attempt in range(64):
+            site = self.random.randint(0,self.rows-1)*self.cols+self.random.randint(first,last)
+            if self.siteCell[site] < 0:
+                break
+        else:
+            free = np.flatnonzero((self.siteCell < 0) & (self.siteSide == side))
+            site = free[0] if len(free) else -1
+        self.cellSite[cell] = site
+        if site >= 0:
+            self.siteCell[site] = cell
+
+    def update(self,part):
+        """ Place the Cells moved since the last update and redraw their items, or the viewport for many moves """
+        if len(part) != self.cells:
+            return
+        if self.shown is None:
+            self.place(part)
+            self.shown = part.copy()
+            return self.render()
+        moved = np.flatnonzero(part != self.shown)
+        if not len(moved):
+            return
+        oldSites = self.cellSite[moved].copy()
+        self.shown = part.copy()
+        if not self.detailed() or len(moved) > self.maxMoves:
+            self.place(part,moved)
+            return self.render()
+        for cell in moved.tolist():
+            self.moveCell(cell,part[cell])
+        for site in oldSites.tolist()+self.cellSite[moved].tolist():
+            self.drawSite(site)
+        for cell in moved.tolist():
+            for conn in self.cellConns[self.cellConnPtr[cell]:self.cellConnPtr[cell+1]].tolist():
+                self.drawConn(conn)
+        self.canvas.tag_lower('site')
+
+    #==========================Drawing==========================#
+    def render(self):
+        """ Redraw the viewport, as a heat map or in detail """
+        self.canvas.delete('circuit')
+        self.siteItems = {}
+        self.connItems = {}
+        self.heatImage = None
+        if self.detailed():
+            self.drawDetail()
+            status = "%d Sites, %d connections" % (len(self.siteItems),len(self.connItems))
+        else:
+            self.drawHeat()
+            status = "Heat map, zoom %.1f" % (self.scale/self.fitScale)
+        # Border of the partitions
+        for first, last in ((0,self.half),(self.half+1,self.worldX)):
+            x1 = (first-self.originX)*self.scale
+            x2 = (last-self.originX)*self.scale
+            self.canvas.create_rectangle(x1,-self.originY*self.scale,x2,(self.worldY-self.originY)*self.scale,tags='circuit')
+        self.canvas.create_text(4,4,anchor='nw',text=status,tags='circuit')
+
+    def drawDetail(self):
+        """ Draw the Sites in the viewport and the connections of their Cells """
+        for site in self.visibleSites().tolist():
+            self.drawSite(site)
+        if self.shown is None:
+            return
+        cells = self.siteCell[self.visibleSites()]
+        inView = np.zeros(self.cells,dtype=bool)
+        inView[cells[cells >= 0]] = True
+        conns = np.flatnonzero(inView[self.connSrcs] | inView[self.connSinks])
+        for conn in conns[:self.maxLines].tolist():
+            self.drawConn(conn)
+        self.canvas.tag_lower('site')
+
+    def drawSite(self,site):
+        """ Draw a Site in the viewport with its Cell and Tag, replacing its previous items """
+        for item in self.siteItems.pop(site,()):
+            self.canvas.delete(item)
+        if not self.isVisible(site):
+            return
+        cell = self.siteCell[site]
+        fill = 'white'
+        if cell >= 0:
+            fill = 'lightsteelblue' if self.shown[cell] == 0 else 'darkseagreen1'
+        items = [self.canvas.create_rectangle(*self.siteBox(site),fill=fill,tags=('circuit','site'))]
+        if cell >= 0 and self.scale >= self.tagSize:
+            x, y = self.siteCenter(site)
+            items.append(self.canvas.create_text(x,y,text=cell,tags='circuit'))
+        self.siteItems[site] = items
+
+    def drawConn(self,conn):
+        """ Draw a connection with an end in the viewport, replacing its previous line """
+        item = self.connItems.pop(conn,None)
+        if item is not None:
+            self.canvas.delete(item)
+        src = self.cellSite[self.connSrcs[conn]]
+        sink = self.cellSite[self.connSinks[conn]]
+        if src < 0 or sink < 0 or not (self.isVisible(src) or self.isVisible(sink)):
+            return
+        if len(self.connItems) >= self.maxLines:
+            return
+        cut = self.shown[self.connSrcs[conn]] != self.shown[self.connSinks[conn]]
+        self.connItems[conn] = self.canvas.create_line(*(self.siteCenter(src)+self.siteCenter(sink)),
+                                                       fill='red' if cut else 'gray',tags='circuit')
+
+    def drawHeat(self):
+        """ Draw the viewport as an image of bins. A bin is white when its Sites are free and takes the
+            partition color of its Cells as they fill it, shifting to the cut color by the share of Cells on the cut """
+        binsX = int(np.ceil(float(self.width)/self.binSize))
+        binsY = int(np.ceil(float(self.height)/self.binSize))
+        size = binsX*binsY
+        sites = np.arange(len(self.siteCell))
+        siteBins, inView = self.bins(sites,binsX,binsY)
+        capacity = np.bincount(siteBins[inView],minlength=size)
+        color = np.zeros((size,3))
+        color[:] = 240
+        color[capacity > 0] = 255
+        if self.shown is not None:
+            part = self.shown
+            cross = part[self.connSrcs] != part[self.connSinks]
+            onCut = np.zeros(self.cells,dtype=bool)
+            onCut[self.connSrcs[cross]] = True
+            onCut[self.connSinks[cross]] = True
+            placed = np.flatnonzero(self.cellSite >= 0)
+            cellBins, inView = self.bins(self.cellSite[placed],binsX,binsY)
+            placed = placed[inView]
+            cellBins = cellBins[inView]
+            count = np.bincount(cellBins,minlength=size).astype(float)
+            full = count > 0
+            shareB = np.bincount(cellBins,weights=part[placed],minlength=size)[full]/count[full]
+            shareCut = np.bincount(cellBins,weights=onCut[placed],minlength=size)[full]/count[full]
+            density = np.minimum(count[full]/capacity[full],1.0)[:,None]
+            cellColor = self.colorA*(1-shareB[:,None])+self.colorB*shareB[:,None]
+            cellColor = cellColor*(1-shareCut[:,None])+self.colorCut*shareCut[:,None]
+            color[full] = 255*(1-density)+cellColor*density
+        # Rows of hexadecimal colors for the Tk image
+        pixels = color.astype(np.uint8).reshape(binsY,binsX*3)
+        data = []
+        for row in pixels:
+            hexRow = row.tobytes().encode('hex')
+            data.append('{'+' '.join('#'+hexRow[i:i+6] for i in range(0,len(hexRow),6))+'}')
+        image = tk.PhotoImage(master=self.canvas,width=binsX,height=binsY)
+        image.put(' '.join(data))
+        self.heatImage = image.zoom(self.binSize)
+        self.canvas.create_image(0,0,anchor='nw',image=self.heatImage,tags='circuit')
+
+    def bins(self,sites,binsX,binsY):
+        """ Heat map bin of the center of every Site and whether it is in the viewport """
+        x = np.floor((self.siteX[sites]+0.5-self.originX)*self.scale/self.binSize).astype(np.int64)
+        y = np.floor((self.siteY[sites]+0.5-self.originY)*self.scale/self.binSize).astype(np.int64)
+        inView = (x >= 0) & (x < binsX) & (y >= 0) & (y < binsY)
+        return y*binsX+x, inView
+
+    #==========================Mouse==========================#
+    def onPress(self,event):
+        self.dragX, self.dragY = event.x, event.y
+
+    def onDrag(self,event):
+        """ Move the drawn items with the pointer, the viewport is redrawn on release """
+        dx, dy = event.x-self.dragX, event.y-self.dragY
+        self.canvas.move('circuit',dx,dy)
+        self.originX-= float(dx)/self.scale
+        self.originY-= float(dy)/self.scale
+        self.dragX, self.dragY = event.x, event.y
+
+    def onRelease(self,event):
+        self.render()
+
+    def onFit(self,event):
+        self.fit()
+        self.render()
+
+    def onWheel(self,event):
+        zoomIn = event.num == 4 or getattr(event,'delta',0) > 0
+        self.zoomAt(event.x,event.y,1.25 if zoomIn else 0.8)
+        self.render()
+
+
+def run(seed,inputfile,debugMode=False,multilevelMode=False):
+    """ Open the partitioning tool window """
+    root = tk.Tk()
+    partition = Partition(root,seed,inputfile,debugMode,multilevelMode)
+    root.wm_title("FM Partitioning Tool. EECE583: Jose Pinilla")
+    root.protocol('WM_DELETE_WINDOW', partition.quitApp)
+    root.resizable(False, False)
+    root.mainloop()
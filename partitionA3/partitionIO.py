@@ -0,0 +1,96 @@
+
+"""Partition result files. Text files hold the partition of every Cell on its own line, binary files a header
+with the cut cost, seed and netlist hash followed by the packed partition"""
+import struct
+import numpy as np
+
+# Binary header: magic, version, bits per Cell, partitions, Cells, cut cost, seed and SHA-1 of the Netlist arrays
+binaryMagic = 'PA3P'
+binaryHeader = struct.Struct('<4sBBHQqq20s')
+binaryVersion = 1
+# Cells written per chunk of a text file
+textChunk = 1<<16
+
+
+def writeText(part,outputfile):
+    """ Write the partition of every Cell on its own line, chunk by chunk """
+    part = np.asarray(part)
+    fout = open(outputfile,'wb')
+    for start in range(0,len(part),textChunk):
+        chunk = part[start:start+textChunk]
+        if len(chunk) and chunk.min() >= 0 and chunk.max() < 10:
+            # Single digit partitions, interleave digit and newline bytes
+            line = np.empty((len(chunk),2),dtype=np.uint8)
+            line[:,0] = chunk+ord('0')
+            line[:,1] = ord('\n')
+            fout.write(line.tobytes())
+        else:
+            fout.write('\n'.join(map(str,chunk.tolist()))+'\n')
+    fout.close()
+
+def readText(inputfile):
+    fin = open(inputfile,'rb')
+    data = fin.read()
+    fin.close()
+    return np.fromstring(data,dtype=np.int64,sep=' ').astype(np.int32)
+
+def writeBinary(part,outputfile,cost=0,seed=0,netlistHash=None):
+    """ Write the header and the partition, packed to one bit per Cell for 2 partitions or one byte per Cell.
+        netlistHash is the SHA-1 hex digest of the Netlist, see Netlist.arrayHash """
+    part = np.asarray(part)
+    parts = int(part.max())+1 if len(part) else 2
+    if parts <= 2:
+        bits, data = 1, np.packbits(part.astype(np.uint8))
+    elif parts <= 256:
+        bits, data = 8, part.astype(np.uint8)
+    else:
+        bits, data = 32, part.astype('<i4')
+    digest = netlistHash.decode('hex') if netlistHash else '\0'*20
+    fout = open(outputfile,'wb')
+    fout.write(binaryHeader.pack(binaryMagic,binaryVersion,bits,max(parts,2),len(part),cost,seed,digest))
+    fout.write(data.tobytes())
+    fout.close()
+
+def readBinary(inputfile):
+    """ Partition and header of a binary file: parts, cost, seed and netlistHash (None when not stored) """
+    fin = open(inputfile,'rb')
+    data = fin.read()
+    fin.close()
+    if len(data) < binaryHeader.size:
+        raise ValueError("%s: truncated partition file" % inputfile)
+    magic, version, bits, parts, cells, cost, seed, digest = binaryHeader.unpack_from(data)
+    if magic != binaryMagic or version != binaryVersion:
+        raise ValueError("%s: not a version %d partition file" % (inputfile,binaryVersion))
+    body = np.frombuffer(data,dtype=np.uint8,offset=binaryHeader.size)
+    if bits == 1:
+        part = np.unpackbits(body)[:cells]
+    elif bits == 8:
+        part = body[:cells]
+    else:
+        part = np.frombuffer(data,dtype='<i4',offset=binaryHeader.size)[:cells]
+    if len(part) != cells:
+        raise ValueError("%s: truncated partition file" % inputfile)
+    header = {'parts':parts,'cost':cost,'seed':seed,'netlistHash':None if digest == '\0'*20 else digest.encode('hex')}
+    return part.astype(np.int32), header
+
+def isBinary(inputfile):
+    fin = open(inputfile,'rb')
+    magic = fin.read(len(binaryMagic))
+    fin.close()
+    return magic == binaryMagic
+
+def writePartition(part,outputfile,cost=0,seed=0,netlist=None):
+    """ Write a binary file for the .bin extension and a text file otherwise """
+    if outputfile.endswith('.bin'):
+        writeBinary(part,outputfile,cost,seed,netlist.arrayHash() if netlist is not None else None)
+    else:
+        writeText(part,outputfile)
+
+def readPartition(inputfile,netlist=None):
+    """ Partition of a text or binary file. For binary files with a netlist hash, the Netlist must match """
+    if not isBinary(inputfile):
+        return readText(inputfile)
+    part, header = readBinary(inputfile)
+    if netlist is not None and header['netlistHash'] and header['netlistHash'] != netlist.arrayHash():
+        raise ValueError("%s: partition of a different netlist" % inputfile)
+    return part
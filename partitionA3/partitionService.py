@@ -0,0 +1,365 @@
+
+"""Local partitioning job service. Jobs are queued over HTTP on localhost and run on a pool of worker
+processes that keep the modules and recently used netlists loaded"""
+import os
+import sys
+import json
+import time
+import getopt
+import urllib2
+import threading
+import multiprocessing
+import SocketServer
+import BaseHTTPServer
+from netlist import Netlist
+from fmListeners import FMListener
+from resultCache import ResultCache
+from partitionIO import writePartition
+from partitionA3 import partition
+
+# Job parameters and their partition() arguments
+jobParams = {'seed':'seed','multilevel':'multilevelMode','passes':'passes','placement':'placement','parts':'parts',
+             'refine':'refine','minImprove':'minImprove','stallMoves':'stallMoves','timeLimit':'timeLimit',
+             'boundary':'boundary','parallel':'parallel'}
+# Types of the job parameters, None is the default of partition()
+paramTypes = {'seed':'int','multilevel':'bool','passes':'int','placement':'split or rand','parts':'int of at least 2','refine':'bool',
+              'minImprove':'int','stallMoves':'int or null','timeLimit':'number or null','boundary':'bool','parallel':'bool',
+              'output':'file name','part':'bool','cache':'bool'}
+# Finished jobs kept for status requests
+maxFinishedJobs = 1000
+# Default directory of the partition files written by jobs
+outputDir = os.path.join(os.path.expanduser('~'),'.partitionA3','output')
+
+# Worker process state: progress queue shared with the service and parsed netlists by file
+_progress = None
+_netlists = {}
+_maxNetlists = 16
+
+
+class ProgressListener(FMListener):
+    """ Send the counters of every pass of a job to the service """
+    def __init__(self,jobId):
+        self.jobId = jobId
+
+    def onPass(self,engine,stats):
+        _progress.put((self.jobId,'pass',stats))
+
+
+def _initWorker(progress):
+    global _progress
+    _progress = progress
+
+def loadNetlist(inputfile):
+    """ Netlist of an input file, parsed once per worker while the file is unchanged """
+    stat = os.stat(inputfile)
+    key = (os.path.abspath(inputfile),stat.st_size,stat.st_mtime)
+    netlist = _netlists.get(key)
+    if netlist is None:
+        if len(_netlists) >= _maxNetlists:
+            _netlists.clear()
+        netlist = _netlists[key] = Netlist.fromFile(inputfile)
+    return netlist
+
+def runJob(jobId,job):
+    """ Run one job on a worker process. Its events, ending with the result, go through the progress queue in order """
+    _progress.put((jobId,'start',{}))
+    result = jobResult(jobId,job)
+    _progress.put((jobId,'error' if 'error' in result else 'done',result))
+
+def jobResult(jobId,job):
+    startTimer = time.time()
+    try:
+        args = dict((jobParams[name],value) for name, value in job.items() if name in jobParams)
+        resultCache = None
+        if job.get('cache',True) and not args.get('timeLimit'):
+            resultCache = ResultCache()
+            resultKey = resultCache.key(job['file'],args)
+            cached = resultCache.get(resultKey)
+            if cached is not None:
+                return resultOf(job,cached[0],cached[1],time.time()-startTimer,True)
+        netlist = loadNetlist(job['file'])
+        part, cost = partition(netlist,listeners=[ProgressListener(jobId)],**args)
+        if resultCache is not None:
+            resultCache.put(resultKey,part,cost)
+        return resultOf(job,part,cost,time.time()-startTimer,False)
+    except Exception as error:
+        return {'error':"%s: %s" % (type(error).__name__,error)}
+
+def resultOf(job,part,cost,wallTime,cached):
+    result = {'cost':int(cost),'wallTime':wallTime,'cached':cached}
+    if job.get('output'):
+        # Binary files carry the netlist hash
+        netlist = loadNetlist(job['file']) if job['output'].endswith('.bin') else None
+        directory = os.path.dirname(job['output'])
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        writePartition(part,job['output'],cost,job.get('seed',30),netlist)
+        result['output'] = job['output']
+    if job.get('part'):
+        result['part'] = part.tolist()
+    return result
+
+
+class Job():
+    """ Queued job and the events sent to clients: queued, start, pass, done or error """
+    def __init__(self,jobId,params):
+        self.id = jobId
+        self.params = params
+        self.state = 'queued'
+        self.events = [{'event':'queued','id':jobId}]
+        self.result = None
+
+
+def checkParam(name,value):
+    """ Whether a job parameter has the type of paramTypes """
+    kind = paramTypes[name]
+    if value is None:
+        return kind.endswith('or null')
+    if name == 'parts':
+        return isinstance(value,(int,long)) and not isinstance(value,bool) and value >= 2
+    if kind == 'bool':
+        return isinstance(value,bool)
+    if kind.startswith('int'):
+        return isinstance(value,(int,long)) and not isinstance(value,bool)
+    if kind.startswith('number'):
+        return isinstance(value,(int,long,float)) and not isinstance(value,bool)
+    if kind == 'split or rand':
+        return value in ('split','rand')
+    # Output files are plain names in the output directory of the service
+    return isinstance(value,basestring) and value not in ('','.','..') and os.path.basename(value) == value
+
+
+class JobService():
+    """ Queue of jobs running on a pool of worker processes. Progress from the workers is
+        collected by a thread and every change wakes up the clients waiting on a job.
+        Partition files of jobs are written to directory, by default outputDir """
+    def __init__(self,processes=None,directory=None):
+        self.directory = directory or outputDir
+        self.progress = multiprocessing.Queue()
+        self.pool = multiprocessing.Pool(processes,_initWorker,(self.progress,))
+        self.jobs = {}
+        self.finished = []
+        self.nextId = 1
+        self.changed = threading.Condition()
+        self.collector = threading.Thread(target=self.collectProgress)
+        self.collector.daemon = True
+        self.collector.start()
+
+    def submit(self,params):
+        """ Queue a job, returns its Job. params needs the input file, other keys are in paramTypes """
+        if not isinstance(params,dict) or not isinstance(params.get('file'),basestring):
+            raise ValueError("Job needs an input file")
+        if not os.path.isfile(params['file']):
+            raise ValueError("No such file: %s" % params['file'])
+        unknown = set(params)-set(paramTypes)-set(['file'])
+        if unknown:
+            raise ValueError("Unknown job parameters: %s" % ', '.join(sorted(unknown)))
+        for name in sorted(set(params)-set(['file'])):
+            if not checkParam(name,params[name]):
+                raise ValueError("Job parameter %s must be %s" % (name,paramTypes[name]))
+        if params.get('output'):
+            params = dict(params,output=os.path.join(self.directory,params['output']))
+        with self.changed:
+            job = Job(self.nextId,params)
+            self.jobs[job.id] = job
+            self.nextId+=1
+        self.pool.apply_async(runJob,(job.id,params))
+        return job
+
+    def collectProgress(self):
+        """ Add the events of the workers to their jobs """
+        while True:
+            jobId, event, data = self.progress.get()
+            with self.changed:
+                job = self.jobs.get(jobId)
+                if job is None:
+                    continue
+                record = {'event':event,'id':jobId}
+                record.update(data)
+                job.events.append(record)
+                if event == 'start':
+                    job.state = 'running'
+                elif event in ('done','error'):
+                    job.state = event
+                    job.result = data
+                    self.finished.append(jobId)
+                    while len(self.finished) > maxFinishedJobs:
+                        del self.jobs[self.finished.pop(0)]
+                self.changed.notify_all()
+
+    def events(self,jobId,start=0,timeout=None):
+        """ Events of a job from index start, waits for new events unless the job is finished.
+            Returns the events and whether the job is finished, None for an unknown job """
+        with self.changed:
+            job = self.jobs.get(jobId)
+            if job is None:
+                return None
+            if len(job.events) <= start and job.state in ('queued','running'):
+                self.changed.wait(timeout)
+            return job.events[start:], job.state not in ('queued','running')
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+class JobHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ POST /jobs: Queue the JSON job of the request body, returns the job id
+        POST /partition: Queue a job and stream its events as JSON lines until done
+        GET /jobs/<id>: Job state and result
+        GET /jobs/<id>/events: Stream the events of a job as JSON lines until done """
+    def do_POST(self):
+        if self.path not in ('/jobs','/partition'):
+            return self.sendJson(404,{'error':'Unknown path %s' % self.path})
+        try:
+            params = json.loads(self.rfile.read(int(self.headers.getheader('content-length',0))))
+            job = self.server.service.submit(params)
+        except ValueError as error:
+            return self.sendJson(400,{'error':str(error)})
+        if self.path == '/jobs':
+            self.sendJson(202,{'id':job.id})
+        else:
+            self.streamEvents(job.id)
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) < 2 or parts[0] != 'jobs' or not parts[1].isdigit():
+            return self.sendJson(404,{'error':'Unknown path %s' % self.path})
+        jobId = int(parts[1])
+        if parts[2:] == ['events']:
+            return self.streamEvents(jobId)
+        with self.server.service.changed:
+            job = self.server.service.jobs.get(jobId)
+            status = None if job is None else {'id':job.id,'state':job.state,'result':job.result}
+        if status is None:
+            return self.sendJson(404,{'error':'Unknown job %d' % jobId})
+        self.sendJson(200,status)
+
+    def sendJson(self,code,data):
+        body = json.dumps(data)+'\n'
+        self.send_response(code)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def streamEvents(self,jobId):
+        """ Write every event of the job on its own line as it happens, the connection closes when the job is done """
+        service = self.server.service
+        if service.events(jobId,0,0) is None:
+            return self.sendJson(404,{'error':'Unknown job %d' % jobId})
+        self.send_response(200)
+        self.send_header('Content-Type','application/x-ndjson')
+        self.end_headers()
+        sent = 0
+        finished = False
+        while not finished:
+            events, finished = service.events(jobId,sent,1.0)
+            for event in events:
+                self.wfile.write(json.dumps(event)+'\n')
+            self.wfile.flush()
+            sent+=len(events)
+
+    def log_message(self,format,*args):
+        if self.server.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self,format,*args)
+
+
+class JobServer(SocketServer.ThreadingMixIn,BaseHTTPServer.HTTPServer):
+    """ HTTP server handling every client on its own thread """
+    daemon_threads = True
+
+    def __init__(self,address,service,verbose=False):
+        BaseHTTPServer.HTTPServer.__init__(self,address,JobHandler)
+        self.service = service
+        self.verbose = verbose
+
+
+def submitJob(job,url='http://127.0.0.1:8583'):
+    """ Client: send a job and yield its events as they arrive, the last one is done or error """
+    request = urllib2.Request(url+'/partition',json.dumps(job),{'Content-Type':'application/json'})
+    try:
+        response = urllib2.urlopen(request)
+    except urllib2.HTTPError as error:
+        yield json.loads(error.read())
+        return
+    for line in iter(response.readline,''):
+        yield json.loads(line)
+    response.close()
+
+
+def main(argv):
+    #=================Options=================#
+    # Default Values
+    port = 8583
+    processes = None
+    verbose = False
+    directory = None
+    inputfile = None
+    job = {}
+
+    try:
+        opts, args = getopt.getopt(argv, "hvmp:j:o:i:s:k:", ["passes="])
+    except getopt.GetoptError:
+        print 'partitionService.py [-p <Port>] [-j <Processes>] [-o <outputDir>] [-v]'
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            print 'partitionService.py [-p <Port>] [-j <Processes>] [-o <outputDir>] [-v]'
+            print 'partitionService.py -i <inputfile> [-p <Port>] [-m] [-s <Seed>] [-k <Parts>] [--passes <Passes>]'
+            print "-p <Port>: Port on 127.0.0.1, default 8583"
+            print "-j <Processes>: Worker processes, default one per CPU"
+            print "-o <outputDir>: Directory of the partition files written by jobs, default ~/.partitionA3/output"
+            print "-v : Log every request"
+            print "-i <inputfile>: Client Mode, send a job to a running service and print its progress and result"
+            print "-m, -s, -k, --passes: Multilevel Mode, seed, partitions and passes of the job"
+            sys.exit()
+        elif opt == '-p':
+            port = int(arg)
+        elif opt == '-j':
+            processes = int(arg)
+        elif opt == '-o':
+            directory = arg
+        elif opt == '-v':
+            verbose = True
+        elif opt == '-i':
+            inputfile = arg
+        elif opt == '-m':
+            job['multilevel'] = True
+        elif opt == '-s':
+            job['seed'] = int(arg)
+        elif opt == '-k':
+            job['parts'] = int(arg)
+        elif opt == '--passes':
+            job['passes'] = int(arg)
+
+    url = 'http://127.0.0.1:%d' % port
+    if inputfile:
+        job['file'] = os.path.abspath(inputfile)
+        event = {}
+        try:
+            for event in submitJob(job,url):
+                print json.dumps(event)
+        except urllib2.URLError as error:
+            print "No partitioning service on %s: %s" % (url,error.reason)
+            sys.exit(2)
+        except IOError as error:
+            print "Connection to the partitioning service on %s lost: %s" % (url,error)
+            sys.exit(2)
+        sys.exit(0 if event.get('event') == 'done' else 1)
+
+    service = JobService(processes,directory)
+    server = JobServer(('127.0.0.1',port),service,verbose)
+    print "Partitioning service on %s" % url
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,96 @@
+
+"""On-disk cache of partition results keyed by netlist contents and run parameters"""
+import os
+import json
+import hashlib
+import numpy as np
+from netlist import Netlist
+
+# Default cache directory, one .npz file per result
+cacheDir = os.path.join(os.path.expanduser('~'),'.partitionA3','results')
+# Bumped when results of the same parameters change, so older entries are never hit
+cacheVersion = 2
+
+
+class ResultCache():
+    """ Partition and cut cost of finished runs, stored as key.npz files in a directory.
+        Reading an entry touches its file, the least recently used entries are evicted
+        past maxEntries files or maxBytes in total """
+    def __init__(self,directory=None,maxEntries=256,maxBytes=256<<20):
+        self.directory = directory or cacheDir
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+
+    def key(self,inputfile,params):
+        """ Key of a run on the input file with a dictionary of run parameters """
+        text = json.dumps({'netlist':Netlist.fileHash(inputfile),'params':params,'version':cacheVersion},sort_keys=True)
+        return hashlib.sha1(text).hexdigest()
+
+    def path(self,key):
+        return os.path.join(self.directory,key+'.npz')
+
+    def get(self,key):
+        """ Partition and cut cost stored under key, None if missing or unreadable """
+        arrays = self.getArrays(key,('part','cost'))
+        if arrays is None:
+            return None
+        return arrays[0], int(arrays[1])
+
+    def put(self,key,part,cost):
+        """ Store a result and evict old entries, skipped if the directory is not writable """
+        self.putArrays(key,part=part,cost=np.array(cost))
+
+    def getArrays(self,key,names):
+        """ Arrays of the given names stored under key, None if missing or unreadable """
+        cachefile = self.path(key)
+        try:
+            stored = np.load(cachefile)
+            try:
+                arrays = tuple(stored[name] for name in names)
+            finally:
+                stored.close()
+        except (IOError,KeyError,ValueError):
+            return None
+        # Mark as recently used
+        try:
+            os.utime(cachefile,None)
+        except OSError:
+            pass
+        return arrays
+
+    def putArrays(self,key,**arrays):
+        """ Store named arrays under key and evict old entries, skipped if the directory is not writable """
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # Written under a temporary name so readers never see partial files
+            tmpfile = self.path(key)+'.%d.tmp' % os.getpid()
+            fout = open(tmpfile,'wb')
+            np.savez(fout,**arrays)
+            fout.close()
+            os.rename(tmpfile,self.path(key))
+        except (IOError,OSError):
+            return
+        self.evict()
+
+    def evict(self):
+        """ Remove least recently used entries past the entry and size limits """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory,name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime,stat.st_size,name))
+        entries.sort(reverse=True)
+
+        totalBytes = 0
+        for index, (mtime, size, name) in enumerate(entries):
+            totalBytes+=size
+            if index >= self.maxEntries or totalBytes > self.maxBytes:
+                try:
+                    os.remove(os.path.join(self.directory,name))
+                except OSError:
+                    pass
@@ -0,0 +1,151 @@
+
+"""Scaling suite: partition generated netlists of growing size and report time and memory against size"""
+import os
+import sys
+import json
+import shutil
+import getopt
+import tempfile
+import numpy as np
+from netlistGen import generate, writeNetlist
+from benchmark import runIsolated, compare, writeJson, writeCsv
+
+
+def sizes(smallest=1000,largest=100000,factor=10):
+    """ Cell counts from smallest to largest, growing by factor """
+    cells = []
+    size = smallest
+    while size <= largest:
+        cells.append(size)
+        size*= factor
+    return cells
+
+def growth(results,field='wallTime'):
+    """ Exponent of the field against the number of pins, slope of the log-log fit. 1.0 is linear """
+    points = [(r['pins'],r[field]) for r in results if r[field] > 0]
+    if len(points) < 2:
+        return None
+    pins, values = zip(*points)
+    return np.polyfit(np.log(pins),np.log(values),1)[0]
+
+def runScaling(cellCounts,genDir,seed=30,multilevelMode=False,passes=6,minImprove=1,stallMoves=None):
+    """ Generate one netlist per Cell count in genDir, reused when present, and benchmark each in its own process.
+        Returns the results and the failed runs, see benchmark.runIsolated """
+    results = []
+    failures = []
+    for cells in cellCounts:
+        inputfile = os.path.join(genDir,'gen%d.txt' % cells)
+        if not os.path.exists(inputfile):
+            srcs, sinks, rows, cols = generate(cells,seed=seed)
+            writeNetlist(inputfile,cells,srcs,sinks,rows,cols)
+        result = runIsolated(inputfile,seed,multilevelMode,passes,minImprove,stallMoves)
+        if 'error' in result:
+            print "%-14s FAILED  %s" % (result['benchmark'],result['error'])
+            failures.append(result)
+            continue
+        print "%-14s cells %8d  nets %8d  cost %7d  wall %9.3fs  %9.0f moves/s  %8.1f MB" % (result['benchmark'],result['cells'],result['nets'],result['cost'],result['wallTime'],result['movesPerSec'],result['peakMemMB'])
+        results.append(result)
+    return results, failures
+
+
+def main(argv):
+    #=================Options=================#
+    # Default Values
+    smallest = 1000
+    largest = 100000
+    factor = 10
+    genDir = None
+    jsonfile = 'scaling.json'
+    csvfile = None
+    baselinefile = None
+    threshold = 0.1
+    timeThreshold = 0.5
+    seed = 30
+    multilevelMode = False
+    maxGrowth = None
+
+    try:
+        opts, args = getopt.getopt(argv, "hma:n:f:d:o:c:b:r:t:g:s:")
+    except getopt.GetoptError:
+        print 'scaling.py [-a <Cells>] [-n <Cells>] [-f <Factor>] [-d <genDir>] [-o <scaling.json>]'
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            print 'scaling.py [-a <Cells>] [-n <Cells>] [-f <Factor>] [-d <genDir>] [-o <scaling.json>] [-c <scaling.csv>] [-b <baseline.json>] [-r <ratio>] [-t <ratio>] [-g <Exponent>] [-s <Seed>] [-m]'
+            print "-a <Cells>: Smallest netlist, default 1000"
+            print "-n <Cells>: Largest netlist, default 100000, up to 1000000"
+            print "-f <Factor>: Size factor between netlists, default 10"
+            print "-d <genDir>: Keep the generated netlists in genDir and reuse them, default a temporary directory"
+            print "-o <scaling.json>: JSON report"
+            print "-c <scaling.csv>: CSV report"
+            print "-b <baseline.json>: Fail on regressions against a previous JSON report"
+            print "-r <ratio>: Allowed cost increase over the baseline, default 0.1"
+            print "-t <ratio>: Allowed wall time increase over the baseline, default 0.5"
+            print "-g <Exponent>: Fail when wall time grows faster than size^Exponent"
+            print "-m : Multilevel Mode"
+            sys.exit()
+        elif opt == '-a':
+            smallest = int(arg)
+        elif opt == '-n':
+            largest = int(arg)
+        elif opt == '-f':
+            factor = int(arg)
+        elif opt == '-d':
+            genDir = arg
+        elif opt == '-o':
+            jsonfile = arg
+        elif opt == '-c':
+            csvfile = arg
+        elif opt == '-b':
+            baselinefile = arg
+        elif opt == '-r':
+            threshold = float(arg)
+        elif opt == '-t':
+            timeThreshold = float(arg)
+        elif opt == '-g':
+            maxGrowth = float(arg)
+        elif opt == '-s':
+            seed = int(arg)
+        elif opt == '-m':
+            multilevelMode = True
+
+    if factor < 2:
+        print "Size factor must be at least 2"
+        sys.exit(2)
+
+    tmpDir = None
+    if genDir is None:
+        genDir = tmpDir = tempfile.mkdtemp(prefix='partitionA3')
+    elif not os.path.isdir(genDir):
+        os.makedirs(genDir)
+    try:
+        results, failures = runScaling(sizes(smallest,largest,factor),genDir,seed,multilevelMode)
+    finally:
+        if tmpDir is not None:
+            shutil.rmtree(tmpDir)
+
+    exponent = growth(results,'wallTime')
+    if exponent is not None:
+        print "Wall time grows as size^%.2f, peak memory as size^%.2f" % (exponent,growth(results,'peakMemMB'))
+
+    writeJson(results,jsonfile)
+    if csvfile:
+        writeCsv(results,csvfile)
+
+    regressions = []
+    if baselinefile:
+        fin = open(baselinefile,'r')
+        baseline = json.load(fin)
+        fin.close()
+        regressions = compare(results,baseline,threshold,timeThreshold)
+    if maxGrowth is not None and exponent is not None and exponent > maxGrowth:
+        regressions.append("wall time grows as size^%.2f, limit %.2f" % (exponent,maxGrowth))
+    for regression in regressions:
+        print "REGRESSION", regression
+    if regressions or failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
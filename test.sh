@@ -1,18 +1,6 @@
 #!/bin/bash
 
+# Run every benchmark and write JSON and CSV reports.
+# Pass -b <baseline.json> to fail on regressions against a previous report.
 
-echo BACKUP >> ./backup.txt
-while read line
-do
-	echo $line >> ./backup.txt
-done < ./results.txt
-
-rm ./results.txt
-
-FILES=./benchmarks/*
-
-
-for f in $FILES
-do
-	python ./partitionA3/partitionA3.py -q -i $f
-done
+python ./partitionA3/benchmark.py -d ./benchmarks -o ./results.json -c ./results.csv "$@"